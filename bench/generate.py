@@ -0,0 +1,154 @@
+import csv
+import io
+import random
+from datetime import date, datetime, time, timedelta
+from psycopg2 import sql
+import rac_lib as rl
+
+COPY_CHUNK = 50000
+
+FIRST_NAMES = ["Алексей", "Мария", "Иван", "Анна", "Дмитрий", "Ольга", "Сергей", "Екатерина",
+               "Павел", "Наталья", "Андрей", "Юлия", "Михаил", "Татьяна", "Николай", "Елена"]
+LAST_NAMES = ["Иванов", "Петров", "Сидоров", "Козлов", "Новиков", "Морозов", "Волков", "Соколов",
+              "Лебедев", "Кузнецов", "Попов", "Васильев", "Зайцев", "Павлов", "Семёнов", "Голубев"]
+BAND_WORDS = ["Северный", "Ветер", "Кислород", "Горизонт", "Полночь", "Сигнал", "Туман", "Маяк",
+              "Резонанс", "Орбита", "Прибой", "Эхо"]
+CONCERT_WORDS = ["Весенний", "Осенний", "Джазовый", "Рок", "Акустический", "Фестиваль", "Вечер", "Квартирник"]
+VENUES = ["ул. Ленина, 1", "пр. Независимости, 58", "ул. Немига, 12", "ул. Октябрьская, 16",
+          "пр. Победителей, 20", "ул. Зыбицкая, 6"]
+
+DURATIONS = [60, 90, 120, 150, 180, 240]
+GAPS = [0, 0, 30, 60, 90]
+OPENING_HOUR = 8
+CLOSING_HOUR = 23
+REHEARSALS_PER_DAY = 5
+FUTURE_DAYS = 60
+
+TABLES = ["performances", "rehearsals", "band_membership", "concerts", "musicians", "bands",
+          "band_stats", "rehearsal_daily_rollup"]
+
+def scale_counts(scale):
+    return {
+        "musicians": scale,
+        "bands": max(scale // 4, 1),
+        "concerts": max(scale // 10, 1),
+        "rehearsals": scale * 3
+    }
+
+def generate_musicians(rng, count):
+    instruments = list(rl.INSTRUMENTS.values())
+    for musician_id in range(1, count + 1):
+        telegram = f"@musician{musician_id}" if rng.random() < 0.7 else None
+        yield (musician_id, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+               f"+375{musician_id:09d}", telegram, rng.choice(instruments))
+
+def generate_bands(rng, count, today):
+    genres = list(rl.GENRES.values())
+    for band_id in range(1, count + 1):
+        name = f"{rng.choice(BAND_WORDS)} {rng.choice(BAND_WORDS)} {band_id}"
+        yield band_id, name, rng.choice(genres), today - timedelta(days=rng.randrange(1, 3650))
+
+def generate_memberships(rng, musician_count, band_count, today):
+    for musician_id in range(1, musician_count + 1):
+        bands = rng.sample(range(1, band_count + 1), min(rng.choice([0, 1, 1, 1, 2, 2, 3]), band_count))
+        for band_id in bands:
+            yield band_id, musician_id, today - timedelta(days=rng.randrange(0, 1000))
+
+def generate_rehearsals(rng, count, band_count, today):
+    per_location = -(-count // len(rl.LOCATIONS))
+    first_day = today + timedelta(days=FUTURE_DAYS - per_location // REHEARSALS_PER_DAY)
+    rehearsal_id = 0
+
+    for location in rl.LOCATIONS:
+        day = first_day
+        cursor = datetime.combine(day, time(OPENING_HOUR))
+        for _ in range(min(per_location, count - rehearsal_id)):
+            duration = rng.choice(DURATIONS)
+            start = cursor + timedelta(minutes=rng.choice(GAPS))
+            if start + timedelta(minutes=duration) > datetime.combine(day, time(CLOSING_HOUR)):
+                day += timedelta(days=1)
+                start = datetime.combine(day, time(OPENING_HOUR))
+            cursor = start + timedelta(minutes=duration)
+            rehearsal_id += 1
+            yield rehearsal_id, rng.randrange(1, band_count + 1), start, duration, location
+
+def generate_concerts(rng, count, today):
+    span = max(count // 2, 30)
+    for concert_id in range(1, count + 1):
+        day = today + timedelta(days=rng.randrange(-span, FUTURE_DAYS))
+        title = f"{rng.choice(CONCERT_WORDS)} концерт №{concert_id}"
+        yield concert_id, title, rng.choice(VENUES), datetime.combine(day, time(rng.choice([18, 19, 20])))
+
+def generate_performances(rng, concert_count, band_count):
+    performance_id = 0
+    for concert_id in range(1, concert_count + 1):
+        lineup = rng.sample(range(1, band_count + 1), min(rng.randint(1, 5), band_count))
+        for order, band_id in enumerate(lineup, 1):
+            performance_id += 1
+            yield performance_id, band_id, concert_id, order
+
+def copy_rows(cursor, table, columns, rows, chunk=COPY_CHUNK):
+    statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier("public", table),
+        sql.SQL(", ").join(map(sql.Identifier, columns))
+    ).as_string(cursor)
+
+    total = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        total += 1
+        if total % chunk == 0:
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+    return total
+
+def _reset_sequence(cursor, table, column, count):
+    cursor.execute("SELECT setval(pg_get_serial_sequence(%s, %s), GREATEST(%s, 1), %s)",
+                   (f"public.{table}", column, count, count > 0))
+
+def seed(conn, scale, seed=0):
+    rng = random.Random(seed)
+    today = date.today()
+    counts = scale_counts(scale)
+
+    with conn.cursor() as cursor:
+        cursor.execute(sql.SQL("TRUNCATE {} RESTART IDENTITY CASCADE").format(
+            sql.SQL(", ").join(sql.Identifier("public", table) for table in TABLES)
+        ))
+
+        loaded = {
+            "musicians": copy_rows(cursor, "musicians",
+                                   ["musician_id", "first_name", "last_name", "phone", "telegram", "instrument"],
+                                   generate_musicians(rng, counts["musicians"])),
+            "bands": copy_rows(cursor, "bands", ["band_id", "band_name", "genre", "founded_date"],
+                               generate_bands(rng, counts["bands"], today)),
+            "concerts": copy_rows(cursor, "concerts", ["concert_id", "concert_title", "venue_address", "concert_date"],
+                                  generate_concerts(rng, counts["concerts"], today))
+        }
+        loaded["band_membership"] = copy_rows(cursor, "band_membership", ["band_id", "musician_id", "join_date"],
+                                              generate_memberships(rng, counts["musicians"], counts["bands"], today))
+        loaded["rehearsals"] = copy_rows(cursor, "rehearsals",
+                                         ["rehearsal_id", "band_id", "rehearsal_date", "duration_minutes", "location"],
+                                         generate_rehearsals(rng, counts["rehearsals"], counts["bands"], today))
+        loaded["performances"] = copy_rows(cursor, "performances",
+                                           ["performance_id", "band_id", "concert_id", "performance_order"],
+                                           generate_performances(rng, counts["concerts"], counts["bands"]))
+
+        _reset_sequence(cursor, "musicians", "musician_id", loaded["musicians"])
+        _reset_sequence(cursor, "bands", "band_id", loaded["bands"])
+        _reset_sequence(cursor, "concerts", "concert_id", loaded["concerts"])
+        _reset_sequence(cursor, "rehearsals", "rehearsal_id", loaded["rehearsals"])
+        _reset_sequence(cursor, "performances", "performance_id", loaded["performances"])
+    conn.commit()
+
+    with conn.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    conn.commit()
+    return loaded
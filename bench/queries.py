@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+import rac_lib as rl
+
+def sample_params():
+    start = datetime.now()
+    end = start + timedelta(days=7)
+    return {
+        "upcoming_events": (start, end, start, end),
+        "rehearsals_in_range": (start, end),
+        "rehearsal_hours_by_band": (start - timedelta(days=30),),
+        "top_bands_all_time": (),
+        "solo_musicians": (),
+        "rehearsal_conflicts": (rl.LOCATIONS[0], start, start + timedelta(hours=2), None),
+        "dashboard_stats": {"estimate_above": None},
+        "search_musicians": {"q": "Иванов", "pattern": "%Иванов%", "instruments": [], "limit": 100},
+        "search_concerts": {"q": "джаз", "pattern": "%джаз%", "limit": 100},
+        "band_members": (1,),
+        "concert_lineup": (1,)
+    }
+
+LIST_PARAMS = {
+    "available_musicians": (1,)
+}
+
+PAGED_QUERIES = {
+    "musicians": (rl.MUSICIANS_LIST_QUERY, rl.MUSICIANS_SORT_KEYS, (), False),
+    "bands": (rl.BANDS_LIST_QUERY, rl.BANDS_SORT_KEYS, (datetime.now(),), False),
+    "concerts": (rl.CONCERTS_LIST_QUERY, rl.CONCERTS_SORT_KEYS, (), True)
+}
+
+def catalog():
+    params = sample_params()
+    entries = [(name, query, params[name]) for name, query in rl.QUERIES.items()]
+    entries += [(f"list_{name}", query, LIST_PARAMS.get(name, ())) for name, query in rl.LIST_QUERIES.items()]
+
+    for name, (query, sort_keys, query_params, descending) in PAGED_QUERIES.items():
+        entries.append((f"page_{name}", *rl.page_sql(query, sort_keys, query_params, limit=rl.PAGE_SIZE + 1, descending=descending)))
+        entries.append((f"count_{name}", rl.count_sql(query), query_params))
+
+    entries += [(f"export_{name}", query, ()) for name, (_, query) in rl.EXPORTS.items()]
+    return entries
@@ -0,0 +1,150 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+import psycopg2
+from psycopg2 import sql
+import rac_lib as rl
+from bench.generate import seed
+from bench.queries import catalog
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rehearsals_and_concerts.sql")
+BENCH_DB = "rac_bench"
+DEFAULT_SCALES = "1000,10000,100000"
+DEFAULT_REPEAT = 5
+
+def schema_script(path=SCHEMA_PATH):
+    lines = []
+    in_copy = False
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if in_copy:
+                in_copy = line.rstrip("\n") != "\\."
+            elif line.startswith("COPY "):
+                in_copy = True
+            elif not line.startswith(("\\", "SET ", "SELECT pg_catalog.set_config")) and " DATABASE " not in line:
+                lines.append(line)
+    return "".join(lines)
+
+def create_database(dbname):
+    admin = psycopg2.connect(**dict(rl.DB_PARAMS, database="postgres"))
+    admin.autocommit = True
+    try:
+        with admin.cursor() as cursor:
+            cursor.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(dbname)))
+            cursor.execute(sql.SQL("CREATE DATABASE {} TEMPLATE template0 ENCODING 'UTF8'").format(sql.Identifier(dbname)))
+    finally:
+        admin.close()
+
+    conn = psycopg2.connect(**dict(rl.DB_PARAMS, database=dbname))
+    with conn.cursor() as cursor:
+        cursor.execute(schema_script())
+    conn.commit()
+    rl.apply_migrations(conn)
+    return conn
+
+def time_query(conn, query, params, repeat):
+    timings = []
+    rows = 0
+    with conn.cursor() as cursor:
+        for _ in range(repeat + 1):
+            started = time.perf_counter()
+            cursor.execute(query, params)
+            rows = len(cursor.fetchall())
+            timings.append((time.perf_counter() - started) * 1000)
+
+    timings = timings[1:]
+    return {
+        "rows": rows,
+        "min_ms": round(min(timings), 2),
+        "median_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0], 2)
+    }
+
+def run_scale(conn, scale, repeat, random_seed):
+    started = time.perf_counter()
+    counts = seed(conn, scale, random_seed)
+    result = {"scale": scale, "counts": counts, "seed_seconds": round(time.perf_counter() - started, 2), "queries": {}}
+
+    conn.autocommit = True
+    try:
+        for name, query, params in catalog():
+            try:
+                result["queries"][name] = time_query(conn, query, params, repeat)
+            except psycopg2.Error as e:
+                result["queries"][name] = {"error": str(e).strip()}
+            print(f"  {name}: {result['queries'][name]}")
+    finally:
+        conn.autocommit = False
+    return result
+
+def markdown_report(report):
+    scales = report["scales"]
+    lines = [
+        "# Бенчмарк запросов",
+        "",
+        f"Дата: {report['generated_at']}, PostgreSQL {report['server_version']}, "
+        f"повторов: {report['repeat']}, seed: {report['seed']}",
+        "",
+        "| Таблица | " + " | ".join(str(s["scale"]) for s in scales) + " |",
+        "|---|" + "---:|" * len(scales)
+    ]
+    for table in scales[0]["counts"] if scales else []:
+        lines.append(f"| {table} | " + " | ".join(str(s["counts"][table]) for s in scales) + " |")
+
+    lines += [
+        "",
+        "Медиана (p95), мс:",
+        "",
+        "| Запрос | " + " | ".join(str(s["scale"]) for s in scales) + " |",
+        "|---|" + "---:|" * len(scales)
+    ]
+    for name in scales[0]["queries"] if scales else []:
+        cells = []
+        for s in scales:
+            stats = s["queries"][name]
+            cells.append("ошибка" if "error" in stats else f"{stats['median_ms']} ({stats['p95_ms']})")
+        lines.append(f"| {name} | " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк запросов на синтетических данных")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="число музыкантов для каждого прогона, через запятую")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="повторов каждого запроса")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора данных")
+    parser.add_argument("--dbname", default=BENCH_DB, help="база для бенчмарка (пересоздаётся)")
+    parser.add_argument("--output", default="bench_report", help="префикс файлов отчёта (.json и .md)")
+    args = parser.parse_args(argv)
+
+    if args.dbname == rl.DB_PARAMS["database"]:
+        print(f"❌ База {args.dbname} используется приложением — укажите другую через --dbname")
+        return 2
+
+    conn = create_database(args.dbname)
+    try:
+        report = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "server_version": conn.server_version,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "scales": []
+        }
+        for scale in (int(s) for s in args.scales.split(",")):
+            print(f"Масштаб {scale}:")
+            report["scales"].append(run_scale(conn, scale, args.repeat, args.seed))
+    finally:
+        conn.close()
+
+    with open(f"{args.output}.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    with open(f"{args.output}.md", "w", encoding="utf-8") as f:
+        f.write(markdown_report(report))
+
+    print(f"✅ Отчёт: {args.output}.json, {args.output}.md")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
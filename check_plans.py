@@ -0,0 +1,72 @@
+import argparse
+import sys
+import rac_lib as rl
+from bench.generate import seed
+from bench.queries import sample_params
+from bench.run import BENCH_DB, create_database
+
+DEFAULT_SCALE = 10000
+
+EXPECTED_INDEXES = {
+    "upcoming_events": {"idx_concerts_concert_date", "idx_rehearsals_rehearsal_date"},
+    "rehearsals_in_range": {"idx_rehearsals_rehearsal_date"},
+    "rehearsal_hours_by_band": {"idx_rehearsal_daily_rollup_day"},
+    "rehearsal_conflicts": {"rehearsals_room_overlap_excl"},
+    "band_members": {"band_membership_pkey"},
+    "concert_lineup": {"idx_performances_concert_id"}
+}
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+def index_conditions(cursor, query, params):
+    cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    plan = cursor.fetchone()[0][0]["Plan"]
+    return {node["Index Name"] for node in plan_nodes(plan) if "Index Cond" in node}
+
+def check(conn):
+    params = sample_params()
+    failed = False
+
+    with conn.cursor() as cursor:
+        for name, query in rl.QUERIES.items():
+            if name not in params:
+                print(f"❌ {name}: нет тестовых параметров")
+                failed = True
+                continue
+            if name not in EXPECTED_INDEXES:
+                print(f"➖ {name}: индекс не ожидается")
+                continue
+
+            missing = EXPECTED_INDEXES[name] - index_conditions(cursor, query, params[name])
+            if missing:
+                print(f"❌ {name}: не используются индексы {', '.join(sorted(missing))}")
+                failed = True
+            else:
+                print(f"✅ {name}")
+    conn.rollback()
+    return failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка планов запросов на синтетических данных")
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE, help="число музыкантов в тестовой базе")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора данных")
+    parser.add_argument("--dbname", default=BENCH_DB, help="база для проверки (пересоздаётся)")
+    args = parser.parse_args(argv)
+
+    if args.dbname == rl.DB_PARAMS["database"]:
+        print(f"❌ База {args.dbname} используется приложением — укажите другую через --dbname")
+        return 2
+
+    conn = create_database(args.dbname)
+    try:
+        seed(conn, args.scale, args.seed)
+        failed = check(conn)
+    finally:
+        conn.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
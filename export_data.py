@@ -0,0 +1,21 @@
+import sys
+import rac_lib as rl
+
+def main(args):
+    if len(args) != 3 or args[0] not in rl.EXPORTS or args[1] not in rl.EXPORT_FORMATS:
+        print(f"Использование: python export_data.py {{{'|'.join(rl.EXPORTS)}}} {{{'|'.join(rl.EXPORT_FORMATS)}}} <файл>")
+        return 2
+
+    name, export_format, path = args
+    with open(path, "wb") as dest:
+        exported = rl.export_dataset(name, export_format, dest)
+
+    if exported is None:
+        print(f"❌ {name}: ошибка экспорта")
+        return 1
+
+    print(f"✅ {name}: {exported} строк → {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,67 +1,69 @@
 import streamlit as st
 import rac_lib as rl
-from datetime import date, timedelta, datetime
-import pandas as pd
+from datetime import timedelta, datetime
+from functools import partial
 
 st.set_page_config(page_title="Главная", page_icon="🏠", layout="wide")
 rl.sidebar_pg()
 
 st.title("🏠 Система управления студией")
 
-@st.cache_data(ttl=1)
+EVENTS_LIMIT = 50
+WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+MARKDOWN_SPECIAL = r'([\\`*_{}\[\]()#+\-.!|<>~$:])'
+
+def escape_markdown(text):
+    return text.fillna("").astype(str).str.replace(MARKDOWN_SPECIAL, r'\\\1', regex=True)
+
+def reset_events_limit():
+    st.session_state.pop("events_limit", None)
+
 def load_metrics():
-    metrics_map = {
-        "Музыкантов": "SELECT COUNT(*) FROM musicians",
-        "Коллективов": "SELECT COUNT(*) FROM bands",
-        "Концертов": "SELECT COUNT(*) FROM concerts",
-        "Репетиций": "SELECT COUNT(*) FROM rehearsals"
+    stats = rl.dashboard_stats(estimate_above=rl.ESTIMATE_COUNTS_ABOVE)
+    return {
+        "Музыкантов": stats['musicians'],
+        "Коллективов": stats['bands'],
+        "Концертов": stats['concerts'],
+        "Репетиций": stats['rehearsals']
     }
-    results = {}
-    for label, query in metrics_map.items():
-        res = rl.run_query(query)
-        results[label] = res[0]['count'] if res and res[0].get('count') is not None else 0
-    return results
 
-@st.cache_data(ttl=1)
-def load_upcoming_events(days=7):
-    today = datetime.now()
+@rl.cached("concerts", "rehearsals", "bands")
+def load_upcoming_events(days, today):
     end_date = today + timedelta(days=days)
 
-    events_query = """
-        SELECT '🎭' as icon, concert_title as title, concert_date as dt, venue_address as loc, 'Концерт' as type
-        FROM concerts WHERE concert_date BETWEEN %s AND %s
-        UNION ALL
-        SELECT '🎻', b.band_name, r.rehearsal_date, r.location, 'Репетиция'
-        FROM rehearsals r JOIN bands b ON r.band_id = b.band_id
-        WHERE r.rehearsal_date BETWEEN %s AND %s
-        ORDER BY dt
-    """
-    return rl.run_query(events_query, (today, end_date, today, end_date))
+    return rl.run_named_df("upcoming_events", (today, end_date, today, end_date))
 
 st.subheader("📊 Статистика")
 cols = st.columns(4)
-metrics = load_metrics()
-
-for col, (label, count) in zip(cols, metrics.items()):
-    col.metric(label, count)
 
 st.divider()
 
 st.subheader("📅 Ближайшие мероприятия")
-days_ahead = st.slider("Показать события на дней вперед", 1, 30, 7)
+days_ahead = st.slider("Показать события на дней вперед", 1, 30, 7, on_change=reset_events_limit)
+now = datetime.now().replace(second=0, microsecond=0)
 
-events = load_upcoming_events(days_ahead)
+metrics, events = rl.gather(load_metrics, partial(load_upcoming_events, days_ahead, now))
 
-if events:
-    df = pd.DataFrame(events)
-    df['Дата'] = pd.to_datetime(df['dt']).dt.strftime('%d.%m %H:%M')
+for col, (label, count) in zip(cols, metrics.items()):
+    col.metric(label, count)
+
+if not events.empty:
+    limit = st.session_state.get("events_limit", EVENTS_LIMIT)
+    shown = events.head(limit)
     
-    for _, row in df.iterrows():
+    dt = shown['dt']
+    lines = ("- " + shown['icon'] + " `" + dt.dt.strftime('%H:%M') + "` **" + escape_markdown(shown['title']) + "** — "
+             + shown['type'] + " | 📍 " + escape_markdown(shown['loc']))
+    
+    days = dt.dt.strftime('%d.%m') + ", " + dt.dt.dayofweek.map(dict(enumerate(WEEKDAYS)))
+    
+    for day, day_lines in lines.groupby(days, sort=False):
         with st.container(border=True):
-            c1, c2, c3 = st.columns([0.5, 3, 1])
-            c1.title(row['icon'])
-            c2.write(f"**{row['title']}**")
-            c2.caption(f"{row['type']} | 📍 {row['loc']}")
-            c3.write(f"⏰ {row['Дата']}")
+            st.markdown(f"##### 🗓️ {day}\n" + "\n".join(day_lines))
+    
+    if len(events) > limit:
+        if st.button(f"Показать ещё ({len(events) - limit})"):
+            st.session_state.events_limit = limit + EVENTS_LIMIT
+            st.rerun()
 else:
     st.info("На выбранный период мероприятий нет.")
\ No newline at end of file
@@ -0,0 +1,17 @@
+--
+-- Индексы для фильтров по периодам и внешних ключей
+--
+
+CREATE INDEX IF NOT EXISTS idx_rehearsals_rehearsal_date ON public.rehearsals USING btree (rehearsal_date);
+
+CREATE INDEX IF NOT EXISTS idx_rehearsals_location_date ON public.rehearsals USING btree (location varchar_ops, rehearsal_date);
+
+CREATE INDEX IF NOT EXISTS idx_rehearsals_band_date ON public.rehearsals USING btree (band_id, rehearsal_date);
+
+CREATE INDEX IF NOT EXISTS idx_concerts_concert_date ON public.concerts USING btree (concert_date);
+
+CREATE INDEX IF NOT EXISTS idx_performances_concert_id ON public.performances USING btree (concert_id);
+
+CREATE INDEX IF NOT EXISTS idx_performances_band_id ON public.performances USING btree (band_id);
+
+CREATE INDEX IF NOT EXISTS idx_band_membership_musician_id ON public.band_membership USING btree (musician_id);
@@ -0,0 +1,43 @@
+--
+-- Запрет пересечения репетиций в одном зале на уровне базы данных
+--
+
+CREATE EXTENSION IF NOT EXISTS btree_gist WITH SCHEMA public;
+
+DO $$
+DECLARE
+    conflicts text;
+BEGIN
+    SELECT string_agg(format('№%s', rehearsal_id), ', ')
+    INTO conflicts
+    FROM public.rehearsals
+    WHERE duration_minutes IS NULL;
+
+    IF conflicts IS NOT NULL THEN
+        RAISE EXCEPTION 'У репетиций не указана длительность: %', conflicts
+            USING HINT = 'Укажите длительность этих репетиций и перезапустите приложение.';
+    END IF;
+
+    SELECT string_agg(format('№%s и №%s (%s, %s)', a.rehearsal_id, b.rehearsal_id, a.location, b.rehearsal_date), '; ')
+    INTO conflicts
+    FROM public.rehearsals a
+    JOIN public.rehearsals b
+      ON b.location = a.location
+     AND b.rehearsal_id > a.rehearsal_id
+     AND tsrange(b.rehearsal_date, b.rehearsal_date + b.duration_minutes * interval '1 minute')
+      && tsrange(a.rehearsal_date, a.rehearsal_date + a.duration_minutes * interval '1 minute');
+
+    IF conflicts IS NOT NULL THEN
+        RAISE EXCEPTION 'В базе есть пересекающиеся репетиции в одном зале: %', conflicts
+            USING HINT = 'Перенесите или удалите эти репетиции и перезапустите приложение.';
+    END IF;
+END;
+$$;
+
+ALTER TABLE public.rehearsals ALTER COLUMN duration_minutes SET NOT NULL;
+
+ALTER TABLE ONLY public.rehearsals
+    ADD CONSTRAINT rehearsals_room_overlap_excl EXCLUDE USING gist (
+        location WITH =,
+        tsrange(rehearsal_date, rehearsal_date + duration_minutes * interval '1 minute') WITH &&
+    );
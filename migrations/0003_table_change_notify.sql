@@ -0,0 +1,30 @@
+--
+-- Уведомления об изменении таблиц для сброса кэша (LISTEN rac_table_changes)
+--
+
+CREATE OR REPLACE FUNCTION public.rac_notify_table_change() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    PERFORM pg_notify('rac_table_changes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER musicians_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.musicians
+    FOR EACH STATEMENT EXECUTE FUNCTION public.rac_notify_table_change();
+
+CREATE TRIGGER bands_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.bands
+    FOR EACH STATEMENT EXECUTE FUNCTION public.rac_notify_table_change();
+
+CREATE TRIGGER band_membership_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.band_membership
+    FOR EACH STATEMENT EXECUTE FUNCTION public.rac_notify_table_change();
+
+CREATE TRIGGER concerts_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.concerts
+    FOR EACH STATEMENT EXECUTE FUNCTION public.rac_notify_table_change();
+
+CREATE TRIGGER performances_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.performances
+    FOR EACH STATEMENT EXECUTE FUNCTION public.rac_notify_table_change();
+
+CREATE TRIGGER rehearsals_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.rehearsals
+    FOR EACH STATEMENT EXECUTE FUNCTION public.rac_notify_table_change();
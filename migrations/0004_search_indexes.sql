@@ -0,0 +1,18 @@
+--
+-- Полнотекстовый и триграммный поиск по музыкантам и концертам
+--
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public;
+
+CREATE INDEX IF NOT EXISTS idx_musicians_search_trgm ON public.musicians
+    USING gin ((last_name || ' ' || first_name || ' ' || phone || ' ' || COALESCE(telegram, '')) public.gin_trgm_ops);
+
+ALTER TABLE ONLY public.concerts
+    ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('russian'::regconfig, concert_title || ' ' || venue_address)
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_concerts_search_vector ON public.concerts USING gin (search_vector);
+
+CREATE INDEX IF NOT EXISTS idx_concerts_search_trgm ON public.concerts
+    USING gin ((concert_title || ' ' || venue_address) public.gin_trgm_ops);
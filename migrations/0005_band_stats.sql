@@ -0,0 +1,93 @@
+--
+-- Сводная статистика по коллективам, поддерживаемая триггерами
+--
+
+CREATE TABLE public.band_stats (
+    band_id integer NOT NULL,
+    members integer DEFAULT 0 NOT NULL,
+    rehearsals_count integer DEFAULT 0 NOT NULL,
+    total_minutes bigint DEFAULT 0 NOT NULL,
+    CONSTRAINT band_stats_pkey PRIMARY KEY (band_id),
+    CONSTRAINT band_stats_band_id_fk FOREIGN KEY (band_id) REFERENCES public.bands(band_id) ON DELETE CASCADE
+);
+
+INSERT INTO public.band_stats (band_id, members, rehearsals_count, total_minutes)
+SELECT b.band_id, COALESCE(m.members, 0), COALESCE(r.rehearsals_count, 0), COALESCE(r.total_minutes, 0)
+FROM public.bands b
+LEFT JOIN (
+    SELECT band_id, COUNT(*) AS members
+    FROM public.band_membership
+    GROUP BY band_id
+) m ON m.band_id = b.band_id
+LEFT JOIN (
+    SELECT band_id, COUNT(*) AS rehearsals_count, SUM(duration_minutes) AS total_minutes
+    FROM public.rehearsals
+    GROUP BY band_id
+) r ON r.band_id = b.band_id;
+
+CREATE OR REPLACE FUNCTION public.rac_band_stats_on_band() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    INSERT INTO public.band_stats (band_id) VALUES (NEW.band_id) ON CONFLICT (band_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.rac_band_stats_on_membership() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE public.band_stats SET members = members - 1 WHERE band_id = OLD.band_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE public.band_stats SET members = members + 1 WHERE band_id = NEW.band_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.rac_band_stats_on_rehearsal() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE public.band_stats
+        SET rehearsals_count = rehearsals_count - 1,
+            total_minutes = total_minutes - COALESCE(OLD.duration_minutes, 0)
+        WHERE band_id = OLD.band_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE public.band_stats
+        SET rehearsals_count = rehearsals_count + 1,
+            total_minutes = total_minutes + COALESCE(NEW.duration_minutes, 0)
+        WHERE band_id = NEW.band_id;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER bands_band_stats AFTER INSERT ON public.bands
+    FOR EACH ROW EXECUTE FUNCTION public.rac_band_stats_on_band();
+
+CREATE TRIGGER band_membership_band_stats AFTER INSERT OR UPDATE OR DELETE ON public.band_membership
+    FOR EACH ROW EXECUTE FUNCTION public.rac_band_stats_on_membership();
+
+CREATE TRIGGER rehearsals_band_stats AFTER INSERT OR UPDATE OR DELETE ON public.rehearsals
+    FOR EACH ROW EXECUTE FUNCTION public.rac_band_stats_on_rehearsal();
+
+CREATE TRIGGER band_stats_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.band_stats
+    FOR EACH STATEMENT EXECUTE FUNCTION public.rac_notify_table_change();
+
+CREATE VIEW public.band_summary AS
+SELECT b.band_id, b.band_name, b.genre, b.founded_date,
+       s.members, s.rehearsals_count, s.total_minutes / 60.0 AS total_hours,
+       n.next_rehearsal
+FROM public.bands b
+JOIN public.band_stats s ON s.band_id = b.band_id
+LEFT JOIN LATERAL (
+    SELECT MIN(r.rehearsal_date) AS next_rehearsal
+    FROM public.rehearsals r
+    WHERE r.band_id = b.band_id AND r.rehearsal_date >= LOCALTIMESTAMP
+) n ON true;
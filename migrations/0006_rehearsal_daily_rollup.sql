@@ -0,0 +1,63 @@
+--
+-- Дневные агрегаты репетиций (коллектив × день × зал) для отчётов
+--
+
+CREATE TABLE public.rehearsal_daily_rollup (
+    band_id integer NOT NULL,
+    day date NOT NULL,
+    location character varying(255) NOT NULL,
+    rehearsals_count integer DEFAULT 0 NOT NULL,
+    total_minutes bigint DEFAULT 0 NOT NULL,
+    CONSTRAINT rehearsal_daily_rollup_pkey PRIMARY KEY (band_id, day, location)
+);
+
+CREATE INDEX idx_rehearsal_daily_rollup_day ON public.rehearsal_daily_rollup USING btree (day);
+
+CREATE OR REPLACE FUNCTION public.rac_rebuild_rehearsal_rollup() RETURNS void
+    LANGUAGE sql
+    AS $$
+    DELETE FROM public.rehearsal_daily_rollup;
+    INSERT INTO public.rehearsal_daily_rollup (band_id, day, location, rehearsals_count, total_minutes)
+    SELECT band_id, rehearsal_date::date, location, COUNT(*), COALESCE(SUM(duration_minutes), 0)
+    FROM public.rehearsals
+    GROUP BY band_id, rehearsal_date::date, location;
+$$;
+
+CREATE OR REPLACE FUNCTION public.rac_rehearsal_rollup_apply(p_band_id integer, p_day date, p_location character varying, p_count integer, p_minutes bigint) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    INSERT INTO public.rehearsal_daily_rollup AS d (band_id, day, location, rehearsals_count, total_minutes)
+    VALUES (p_band_id, p_day, p_location, p_count, p_minutes)
+    ON CONFLICT (band_id, day, location) DO UPDATE
+    SET rehearsals_count = d.rehearsals_count + EXCLUDED.rehearsals_count,
+        total_minutes = d.total_minutes + EXCLUDED.total_minutes;
+
+    DELETE FROM public.rehearsal_daily_rollup
+    WHERE band_id = p_band_id AND day = p_day AND location = p_location AND rehearsals_count <= 0;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.rac_rehearsal_rollup_on_rehearsal() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.rac_rehearsal_rollup_apply(OLD.band_id, OLD.rehearsal_date::date, OLD.location,
+                                                  -1, -COALESCE(OLD.duration_minutes, 0));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.rac_rehearsal_rollup_apply(NEW.band_id, NEW.rehearsal_date::date, NEW.location,
+                                                  1, COALESCE(NEW.duration_minutes, 0));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+SELECT public.rac_rebuild_rehearsal_rollup();
+
+CREATE TRIGGER rehearsals_daily_rollup AFTER INSERT OR UPDATE OR DELETE ON public.rehearsals
+    FOR EACH ROW EXECUTE FUNCTION public.rac_rehearsal_rollup_on_rehearsal();
+
+CREATE TRIGGER rehearsal_daily_rollup_notify_change AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.rehearsal_daily_rollup
+    FOR EACH STATEMENT EXECUTE FUNCTION public.rac_notify_table_change();
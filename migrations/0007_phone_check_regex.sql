@@ -0,0 +1,9 @@
+--
+-- phone_check сравнивал номер с регулярным выражением через LIKE и отклонял
+-- любой реальный номер; проверка переписана на оператор ~
+--
+
+ALTER TABLE public.musicians DROP CONSTRAINT IF EXISTS phone_check;
+
+ALTER TABLE public.musicians
+    ADD CONSTRAINT phone_check CHECK (((phone)::text ~ '^\+375[0-9]{9}$'::text)) NOT VALID;
@@ -0,0 +1,20 @@
+--
+-- Удаление коллектива, музыканта или концерта каскадно удаляет связанные
+-- участия, выступления и репетиции одним оператором DELETE
+--
+
+ALTER TABLE public.band_membership
+    DROP CONSTRAINT band_membership_band_id_fk,
+    ADD CONSTRAINT band_membership_band_id_fk FOREIGN KEY (band_id) REFERENCES public.bands(band_id) ON DELETE CASCADE,
+    DROP CONSTRAINT band_membership_musician_id_fk,
+    ADD CONSTRAINT band_membership_musician_id_fk FOREIGN KEY (musician_id) REFERENCES public.musicians(musician_id) ON DELETE CASCADE;
+
+ALTER TABLE public.performances
+    DROP CONSTRAINT performances_band_id_fk,
+    ADD CONSTRAINT performances_band_id_fk FOREIGN KEY (band_id) REFERENCES public.bands(band_id) ON DELETE CASCADE,
+    DROP CONSTRAINT performances_concert_id_fk,
+    ADD CONSTRAINT performances_concert_id_fk FOREIGN KEY (concert_id) REFERENCES public.concerts(concert_id) ON DELETE CASCADE;
+
+ALTER TABLE public.rehearsals
+    DROP CONSTRAINT rehearsals_fk,
+    ADD CONSTRAINT rehearsals_fk FOREIGN KEY (band_id) REFERENCES public.bands(band_id) ON DELETE CASCADE;
@@ -0,0 +1,12 @@
+--
+-- Ближайшая репетиция зависит от текущего времени, поэтому она вычисляется
+-- в запросе списка коллективов с параметром, а не в представлении
+--
+
+DROP VIEW public.band_summary;
+
+CREATE VIEW public.band_summary AS
+SELECT b.band_id, b.band_name, b.genre, b.founded_date,
+       s.members, s.rehearsals_count, s.total_minutes / 60.0 AS total_hours
+FROM public.bands b
+JOIN public.band_stats s ON s.band_id = b.band_id;
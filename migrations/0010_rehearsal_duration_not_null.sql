@@ -0,0 +1,22 @@
+--
+-- Репетиция без длительности попадала в ограничение исключения как
+-- бесконечный интервал и занимала зал навсегда
+--
+
+DO $$
+DECLARE
+    missing text;
+BEGIN
+    SELECT string_agg(format('№%s', rehearsal_id), ', ')
+    INTO missing
+    FROM public.rehearsals
+    WHERE duration_minutes IS NULL;
+
+    IF missing IS NOT NULL THEN
+        RAISE EXCEPTION 'У репетиций не указана длительность: %', missing
+            USING HINT = 'Укажите длительность этих репетиций и перезапустите приложение.';
+    END IF;
+END;
+$$;
+
+ALTER TABLE public.rehearsals ALTER COLUMN duration_minutes SET NOT NULL;
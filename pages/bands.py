@@ -1,53 +1,25 @@
 import streamlit as st
 import rac_lib as rl
 import pandas as pd
-from datetime import date
+from datetime import date, datetime
 import time
 
 st.set_page_config(page_title="Коллективы", page_icon="🎸", layout="wide")
 rl.sidebar_pg()
 st.title("🎸 Музыкальные коллективы")
 
-@st.cache_data(ttl=1)
-def load_bands():
-    query = """
-        SELECT b.*, 
-               COUNT(DISTINCT bm.musician_id) as members,
-               COUNT(DISTINCT r.rehearsal_id) as rehearsals_count
-        FROM bands b
-        LEFT JOIN band_membership bm ON b.band_id = bm.band_id
-        LEFT JOIN rehearsals r ON b.band_id = r.band_id
-        GROUP BY b.band_id
-        ORDER BY b.band_name
-    """
-    data = rl.run_query(query)
-    for b in data:
-        b['genre_display'] = rl.GENRES_REVERSE.get(b['genre'], b['genre'])
-    return data
-
-@st.cache_data(ttl=1)
+@rl.cached("band_membership", "musicians")
 def load_band_members(band_id):
-    query = """
-        SELECT m.first_name, m.last_name, m.instrument, bm.musician_id 
-        FROM band_membership bm JOIN musicians m ON bm.musician_id = m.musician_id 
-        WHERE bm.band_id = %s ORDER BY m.last_name
-    """
-    members = rl.run_query(query, (band_id,))
+    members = rl.run_named("band_members", (band_id,))
     for m in members:
         m['instrument_display'] = rl.INSTRUMENTS_REVERSE.get(m['instrument'], m['instrument'])
     return members
 
-@st.cache_data(ttl=1)
+@rl.cached("musicians", "band_membership")
 def load_available_musicians(band_id):
-    query = """
-        SELECT musician_id, first_name, last_name, instrument FROM musicians 
-        WHERE musician_id NOT IN (SELECT musician_id FROM band_membership WHERE band_id = %s)
-        ORDER BY last_name
-    """
-    available = rl.run_query(query, (band_id,))
-    return available
+    return rl.run_named("available_musicians", (band_id,))
 
-bands = load_bands()
+bands = rl.snapshot("bands")
 if not bands:
     st.info("Коллективов нет. Создайте первый во вкладке 'Создать'.")
 
@@ -57,11 +29,19 @@ tab1, tab2, tab3 = st.tabs(["Список", "Создать/Ред.", "Сост
 
 with tab1:
     if bands:
-        df = pd.DataFrame(bands)
-        st.dataframe(df[['band_name', 'genre_display', 'founded_date', 'members', 'rehearsals_count']].rename(
-            columns={'band_name': 'Название', 'genre_display': 'Жанр', 'founded_date': 'Основан', 
-                     'members': 'Участники', 'rehearsals_count': 'Репетиций (за все время)'}), 
-            use_container_width=True, hide_index=True)
+        now = datetime.now().replace(second=0, microsecond=0)
+        page, has_next = rl.keyset_page("bands", rl.BANDS_LIST_QUERY, rl.BANDS_SORT_KEYS, (now,))
+        if page:
+            df = pd.DataFrame(page)
+            df['genre_display'] = df['genre'].map(lambda x: rl.GENRES_REVERSE.get(x, x))
+            df['total_hours'] = df['total_hours'].astype(float).round(1)
+            df['next_rehearsal'] = pd.to_datetime(df['next_rehearsal']).dt.strftime('%d.%m.%Y %H:%M').fillna('—')
+            st.dataframe(df[['band_name', 'genre_display', 'founded_date', 'members', 'rehearsals_count', 'total_hours', 'next_rehearsal']].rename(
+                columns={'band_name': 'Название', 'genre_display': 'Жанр', 'founded_date': 'Основан', 
+                         'members': 'Участники', 'rehearsals_count': 'Репетиций (за все время)',
+                         'total_hours': 'Часов (за все время)', 'next_rehearsal': 'Ближайшая репетиция'}), 
+                use_container_width=True, hide_index=True)
+        rl.page_controls("bands", page, rl.BANDS_SORT_KEYS, has_next, len(bands))
     
 with tab2:
     is_edit = st.toggle("Режим редактирования")
@@ -95,28 +75,20 @@ with tab2:
                 genre_code = rl.GENRES[b_genre]
                 if target_band:
                     sql = "UPDATE bands SET band_name=%s, genre=%s, founded_date=%s WHERE band_id=%s"
-                    args = (b_name, genre_code, b_date, target_band['band_id'])
+                    saved = rl.execute_non_query(sql, (b_name, genre_code, b_date, target_band['band_id']))
                     action = "обновлен"
                 else:
-                    sql = "INSERT INTO bands (band_name, genre, founded_date) VALUES (%s, %s, %s)"
-                    args = (b_name, genre_code, b_date)
+                    saved = rl.insert_returning("bands", {"band_name": b_name, "genre": genre_code, "founded_date": b_date})
                     action = "создан"
                 
-                if rl.execute_non_query(sql, args):
+                if saved:
                     st.toast(f"✅ Коллектив {b_name} {action}!", icon="🎸")
-                    load_bands.clear()
                     time.sleep(0.5)
                     st.rerun()
 
         if is_edit and delete_button:
-            band_id = target_band['band_id']
-            rl.execute_non_query("DELETE FROM performances WHERE band_id=%s", (band_id,))
-            rl.execute_non_query("DELETE FROM rehearsals WHERE band_id=%s", (band_id,))
-            rl.execute_non_query("DELETE FROM band_membership WHERE band_id=%s", (band_id,))
-            
-            if rl.delete_record('bands', 'band_id', band_id):
+            if rl.delete_many("bands", [target_band['band_id']]) is not None:
                 st.toast(f"✅ Коллектив {target_band['band_name']} удален!", icon="🗑️")
-                load_bands.clear()
                 time.sleep(0.5)
                 st.rerun()
 
@@ -136,7 +108,6 @@ with tab3:
                 if col2.button("❌", key=f"del_{m['musician_id']}"):
                     if rl.execute_non_query("DELETE FROM band_membership WHERE band_id=%s AND musician_id=%s", (bid, m['musician_id'])):
                         st.toast(f"Участник {m['last_name']} удален.", icon="👋")
-                        load_band_members.clear()
                         time.sleep(0.5)
                         st.rerun()
         else:
@@ -159,7 +130,6 @@ with tab3:
                     
                     if rl.execute_non_query(query, (bid, musician_id)):
                         st.toast("✅ Музыкант добавлен!", icon="➕")
-                        load_band_members.clear()
                         time.sleep(0.5)
                         st.rerun()
         else:
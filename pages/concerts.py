@@ -8,62 +8,54 @@ rl.sidebar_pg()
 
 st.title("🎭 Концерты")
 
-@st.cache_data(ttl=1)
 def load_bands():
-    data = rl.run_query("SELECT band_id, band_name FROM bands ORDER BY band_name")
+    data = rl.snapshot("bands")
     return {b['band_name']: b['band_id'] for b in data}, [b['band_name'] for b in data]
 
-@st.cache_data(ttl=1)
+@rl.cached("concerts")
 def load_concerts():
-    query = """
-        SELECT c.*, 
-               COUNT(p.performance_id) as band_count,
-               STRING_AGG(b.band_name, ', ') as bands_list
-        FROM concerts c
-        LEFT JOIN performances p ON c.concert_id = p.concert_id
-        LEFT JOIN bands b ON p.band_id = b.band_id
-        GROUP BY c.concert_id
-        ORDER BY c.concert_date DESC
-    """
-    return rl.run_query(query)
+    return rl.run_named("concerts")
 
-@st.cache_data(ttl=1)
+@rl.cached("performances", "bands")
 def load_concert_lineup(concert_id):
-    query = """
-        SELECT b.band_name, p.performance_order
-        FROM performances p
-        JOIN bands b ON p.band_id = b.band_id
-        WHERE p.concert_id = %s
-        ORDER BY p.performance_order NULLS LAST, b.band_name
-    """
-    return rl.run_query(query, (concert_id,))
+    return rl.run_named("concert_lineup", (concert_id,))
 
-bands_map, bands_list = load_bands()
-concerts_data = load_concerts()
+PERFORMANCE_COLUMNS = ["concert_id", "band_id", "performance_order"]
+
+def build_lineup(concert_id, band_names):
+    return [(concert_id, bands_map[name], i) for i, name in enumerate(band_names, 1) if name in bands_map]
+
+(bands_map, bands_list), concerts_data = rl.gather(load_bands, load_concerts)
 
 st.subheader("📋 Все концерты")
 
 if concerts_data:
-    df = pd.DataFrame(concerts_data)
-    df['Дата и время'] = pd.to_datetime(df['concert_date']).dt.strftime('%d.%m.%Y %H:%M')
-    df['Коллективы'] = df['bands_list'].fillna('Не указаны')
-    df_display = df.rename(columns={
-        'concert_title': 'Название',
-        'venue_address': 'Адрес',
-        'band_count': 'Кол-во групп'
-    })
-    
     search = st.text_input("🔍 Поиск по названию или адресу")
+    
     if search:
-        mask = df_display['Название'].str.contains(search, case=False) | \
-               df_display['Адрес'].str.contains(search, case=False)
-        df_display = df_display[mask]
+        page = rl.search_concerts(search)
+    else:
+        page, has_next = rl.keyset_page("concerts", rl.CONCERTS_LIST_QUERY, rl.CONCERTS_SORT_KEYS, descending=True)
     
-    st.dataframe(
-        df_display[['Название', 'Адрес', 'Дата и время', 'Кол-во групп', 'Коллективы']],
-        use_container_width=True,
-        hide_index=True
-    )
+    if page:
+        df = pd.DataFrame(page)
+        df['Дата и время'] = pd.to_datetime(df['concert_date']).dt.strftime('%d.%m.%Y %H:%M')
+        df['Коллективы'] = df['bands_list'].fillna('Не указаны')
+        df_display = df.rename(columns={
+            'concert_title': 'Название',
+            'venue_address': 'Адрес',
+            'band_count': 'Кол-во групп'
+        })
+        
+        st.dataframe(
+            df_display[['Название', 'Адрес', 'Дата и время', 'Кол-во групп', 'Коллективы']],
+            use_container_width=True,
+            hide_index=True
+        )
+        if not search:
+            rl.page_controls("concerts", page, rl.CONCERTS_SORT_KEYS, has_next, len(concerts_data))
+    else:
+        st.info("Концерты не найдены.")
 else:
     st.info("В базе данных пока нет концертов.")
 
@@ -95,34 +87,17 @@ with tab1:
             else:
                 full_datetime = datetime.combine(concert_date, concert_time)
                 
-                query = """
-                    INSERT INTO concerts (concert_title, venue_address, concert_date) 
-                    VALUES (%s, %s, %s)
-                """
-                success = rl.execute_non_query(query, (title, address, full_datetime))
+                with rl.transaction() as tx:
+                    concert = rl.insert_returning("concerts", {
+                        "concert_title": title,
+                        "venue_address": address,
+                        "concert_date": full_datetime
+                    }, tx=tx)
+                    rl.bulk_insert("performances", PERFORMANCE_COLUMNS, build_lineup(concert['concert_id'], selected_bands), tx=tx)
                 
-                if success:
-                    get_id_query = "SELECT concert_id FROM concerts WHERE concert_title = %s AND venue_address = %s AND concert_date = %s ORDER BY concert_id DESC LIMIT 1"
-                    concert_id_result = rl.run_query(get_id_query, (title, address, full_datetime))
-                    
-                    if concert_id_result:
-                        concert_id = concert_id_result[0]['concert_id']
-                        
-                        all_success = True
-                        for i, band_name in enumerate(selected_bands, 1):
-                            band_id = bands_map.get(band_name)
-                            if band_id:
-                                perf_query = "INSERT INTO performances (concert_id, band_id, performance_order) VALUES (%s, %s, %s)"
-                                if not rl.execute_non_query(perf_query, (concert_id, band_id, i)):
-                                    all_success = False
-                                    st.error(f"Ошибка при добавлении коллектива: {band_name}")
-                        
-                        if all_success:
-                            st.success("✅ Концерт создан!")
-                            load_concerts.clear()
-                            st.rerun()
-                    else:
-                        st.error("❌ Не удалось получить ID созданного концерта")
+                if tx.ok:
+                    st.success("✅ Концерт создан!")
+                    st.rerun()
                 else:
                     st.error("❌ Ошибка при создании концерта")
 
@@ -172,22 +147,13 @@ with tab2:
                             SET concert_title=%s, venue_address=%s, concert_date=%s 
                             WHERE concert_id=%s
                         """
-                        success = rl.execute_non_query(
-                            update_query, 
-                            (new_title, new_address, new_datetime, concert['concert_id'])
-                        )
+                        with rl.transaction() as tx:
+                            tx.execute(update_query, (new_title, new_address, new_datetime, concert['concert_id']))
+                            tx.execute("DELETE FROM performances WHERE concert_id = %s", (concert['concert_id'],))
+                            rl.bulk_insert("performances", PERFORMANCE_COLUMNS, build_lineup(concert['concert_id'], new_bands), tx=tx)
                         
-                        if success:
-                            rl.execute_non_query("DELETE FROM performances WHERE concert_id = %s", (concert['concert_id'],))
-                            
-                            for i, band_name in enumerate(new_bands, 1):
-                                band_id = bands_map.get(band_name)
-                                if band_id:
-                                    perf_query = "INSERT INTO performances (concert_id, band_id, performance_order) VALUES (%s, %s, %s)"
-                                    rl.execute_non_query(perf_query, (concert['concert_id'], band_id, i))
-                            
+                        if tx.ok:
                             st.success("✅ Концерт обновлен!")
-                            load_concerts.clear()
                             st.rerun()
                         else:
                             st.error("❌ Ошибка при обновлении")
@@ -210,18 +176,10 @@ with tab3:
             
             if st.button("Удалить", type="primary", disabled=not confirm):
                 ids_to_delete = [concert_options[name] for name in to_delete]
+                deleted = rl.delete_many("concerts", ids_to_delete)
                 
-                placeholders = ', '.join(['%s'] * len(ids_to_delete))
-                
-                delete_perf = f"DELETE FROM performances WHERE concert_id IN ({placeholders})"
-                rl.execute_non_query(delete_perf, ids_to_delete)
-                
-                delete_concerts = f"DELETE FROM concerts WHERE concert_id IN ({placeholders})"
-                success = rl.execute_non_query(delete_concerts, ids_to_delete)
-                
-                if success:
-                    st.success(f"✅ Удалено {len(to_delete)} концертов")
-                    load_concerts.clear()
+                if deleted is not None:
+                    st.success(f"✅ Удалено {deleted} концертов")
                     st.rerun()
                 else:
                     st.error("❌ Ошибка при удалении")
\ No newline at end of file
@@ -0,0 +1,49 @@
+import streamlit as st
+import rac_lib as rl
+
+st.set_page_config(page_title="Импорт", page_icon="📥", layout="wide")
+rl.sidebar_pg()
+
+st.title("📥 Импорт данных")
+
+import_name = st.selectbox("Что загружаем", list(rl.IMPORTS), format_func=lambda name: rl.IMPORTS[name][0])
+_, columns, required, _, _ = rl.IMPORTS[import_name]
+
+st.caption("Колонки файла: " + ", ".join(f"**{c}**" if c in required else c for c in columns) + " (жирным — обязательные). "
+           "Инструменты и жанры можно указывать по-русски или кодом, даты — в формате ДД.ММ.ГГГГ или ГГГГ-ММ-ДД.")
+
+if import_name == "musicians":
+    st.info("Музыканты с уже существующим телефоном обновляются, остальные добавляются. Пустые имя и Telegram не затирают уже сохранённые значения.")
+elif import_name == "bands":
+    st.info("Коллективы с уже существующим названием обновляются, остальные добавляются.")
+else:
+    st.info("Музыкант ищется по телефону, коллектив — по названию; оба должны уже существовать.")
+
+uploaded = st.file_uploader("Файл CSV или Excel", type=["csv", "xlsx"])
+
+if uploaded is not None and st.button("Загрузить", type="primary"):
+    with st.spinner("Загрузка..."):
+        result = rl.import_file(import_name, uploaded, uploaded.name)
+
+    if result is not None:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Строк в файле", result['rows'])
+        col2.metric("Добавлено", result['inserted'])
+        col3.metric("Обновлено", result['updated'])
+        col4.metric("Ошибок", len(result['errors']))
+
+        if not result['errors'].empty:
+            st.subheader("⚠️ Строки с ошибками")
+            st.dataframe(
+                result['errors'].rename(columns={'row': 'Строка', 'column': 'Колонка', 'message': 'Ошибка'}),
+                use_container_width=True,
+                hide_index=True
+            )
+            st.download_button(
+                "⬇️ Скачать отчёт об ошибках",
+                result['errors'].to_csv(index=False).encode("utf-8-sig"),
+                file_name=f"{import_name}_errors.csv",
+                mime="text/csv"
+            )
+        else:
+            st.success("✅ Все строки загружены без ошибок")
@@ -9,44 +9,32 @@ rl.sidebar_pg()
 st.title("🎵 Музыканты")
 
 def validate_phone(phone):
-    return bool(re.match(r'^\+375[0-9]{9}$', phone))
+    return bool(re.match(rl.PHONE_PATTERN, phone))
 
-@st.cache_data(ttl=1)
-def load_musicians():
-    query = """
-        SELECT musician_id, first_name, last_name, instrument, phone, telegram
-        FROM musicians 
-        ORDER BY last_name, first_name
-    """
-    data = rl.run_query(query)
-    
-    for m in data:
-        m['instrument_display'] = rl.INSTRUMENTS_REVERSE.get(m['instrument'], m['instrument'])
-        m['display_name'] = f"{m['last_name']} {m['first_name'] or ''}"
-    return data
-
-if 'musicians_data' not in st.session_state:
-    st.session_state.musicians_data = load_musicians()
-
-data = st.session_state.musicians_data
-df = pd.DataFrame(data)
+data = rl.snapshot("musicians")
 
 tab1, tab2, tab3 = st.tabs(["Список", "Добавить", "Управление"])
 
 with tab1:
-    if not df.empty:
-        df_show = df.copy()
-        
-        search = st.text_input("🔍 Поиск", placeholder="Имя, фамилия или телефон...")
-        if search:
-            mask = df_show.astype(str).apply(lambda x: x.str.contains(search, case=False)).any(axis=1)
-            df_show = df_show[mask]
+    search = st.text_input("🔍 Поиск", placeholder="Имя, фамилия или телефон...")
+    
+    if search:
+        page = rl.search_musicians(search)
+        st.caption(f"Найдено: {len(page)}" + (f" (показаны первые {rl.SEARCH_LIMIT})" if len(page) == rl.SEARCH_LIMIT else ""))
+    else:
+        page, has_next = rl.keyset_page("musicians", rl.MUSICIANS_LIST_QUERY, rl.MUSICIANS_SORT_KEYS)
+    
+    if page:
+        df_show = pd.DataFrame(page)
+        df_show['instrument_display'] = df_show['instrument'].map(lambda x: rl.INSTRUMENTS_REVERSE.get(x, x))
             
         st.dataframe(
             df_show[['last_name', 'first_name', 'instrument_display', 'phone', 'telegram']]
             .rename(columns={'last_name': 'Фамилия', 'first_name': 'Имя', 'instrument_display': 'Инструмент', 'phone': 'Телефон'}),
             use_container_width=True, hide_index=True
         )
+        if not search:
+            rl.page_controls("musicians", page, rl.MUSICIANS_SORT_KEYS, has_next, rl.count_rows(rl.MUSICIANS_LIST_QUERY))
     else:
         st.info("Список пуст")
 
@@ -64,18 +52,21 @@ with tab2:
             if not l_name or not validate_phone(phone):
                 st.error("Ошибка: Проверьте фамилию и формат телефона (+375...)")
             else:
-                sql = """INSERT INTO musicians (first_name, last_name, instrument, phone, telegram) 
-                         VALUES (%s, %s, %s, %s, %s)"""
-                if rl.execute_non_query(sql, (f_name, l_name, rl.INSTRUMENTS[inst], phone, tg)):
+                if rl.insert_returning("musicians", {
+                    "first_name": f_name,
+                    "last_name": l_name,
+                    "instrument": rl.INSTRUMENTS[inst],
+                    "phone": phone,
+                    "telegram": tg
+                }):
                     st.toast("✅ Музыкант добавлен!", icon="🎵"); 
-                    load_musicians.clear() 
                     time.sleep(0.5)
                     st.rerun()
 
 with tab3:
     st.markdown("### Редактирование и удаление")
-    if not df.empty:
-        musician_options = {m['display_name']: m['musician_id'] for m in data}
+    if data:
+        musician_options = {f"{m['last_name']} {m['first_name'] or ''}": m['musician_id'] for m in data}
         sel_name = st.selectbox("Выберите музыканта", list(musician_options.keys()), key="edit_sel")
         sel_row = next(r for r in data if r['musician_id'] == musician_options[sel_name])
         
@@ -96,7 +87,6 @@ with tab3:
                         (n_phone, rl.INSTRUMENTS[n_inst], n_tg, sel_row['musician_id'])
                     )
                     st.toast("✅ Обновлено!", icon="📝"); 
-                    load_musicians.clear()
                     time.sleep(0.5)
                     st.rerun()
                 else:
@@ -107,13 +97,8 @@ with tab3:
             st.warning("Удаление музыканта автоматически удалит его из всех коллективов.")
             
             if st.form_submit_button("Удалить музыканта", type="primary"):
-                musician_id = sel_row['musician_id']
-                
-                rl.delete_record("band_membership", "musician_id", musician_id)
-                
-                if rl.delete_record("musicians", "musician_id", musician_id):
+                if rl.delete_many("musicians", [sel_row['musician_id']]) is not None:
                     st.toast("✅ Музыкант удален!", icon="🗑️"); 
-                    load_musicians.clear()
                     time.sleep(0.5)
                     st.rerun()
     else:
@@ -0,0 +1,68 @@
+import streamlit as st
+import rac_lib as rl
+
+st.set_page_config(page_title="Производительность", page_icon="⏱️", layout="wide")
+rl.sidebar_pg()
+
+st.title("⏱️ Производительность запросов")
+
+stats = rl.query_stats()
+
+st.sidebar.header("Настройки")
+capture = st.sidebar.checkbox("Захватывать EXPLAIN ANALYZE", value=stats.explain_above_ms is not None)
+threshold = st.sidebar.number_input("Порог, мс", min_value=1, value=int(stats.explain_above_ms or rl.EXPLAIN_ABOVE_MS), step=50)
+stats.explain_above_ms = threshold if capture else None
+
+if st.sidebar.button("🗑️ Сбросить статистику"):
+    stats.reset()
+    st.rerun()
+
+df = stats.snapshot()
+
+if not df.empty:
+    df = df.sort_values("p95_ms", ascending=False)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Запросов", len(df))
+    col2.metric("Вызовов", int(df['calls'].sum()))
+    col3.metric("Попаданий в кэш", f"{df['cache_hits'].sum() / max(df['calls'].sum(), 1):.0%}")
+
+    st.dataframe(
+        df.rename(columns={
+            'statement': 'Запрос',
+            'calls': 'Вызовов',
+            'cache_hits': 'Из кэша',
+            'cache_misses': 'Выполнено',
+            'p50_ms': 'p50, мс',
+            'p95_ms': 'p95, мс',
+            'p99_ms': 'p99, мс',
+            'rows': 'Строк',
+            'acquire_p95_ms': 'Соединение p95, мс'
+        }),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'p50, мс': st.column_config.NumberColumn(format="%.1f"),
+            'p95, мс': st.column_config.NumberColumn(format="%.1f"),
+            'p99, мс': st.column_config.NumberColumn(format="%.1f"),
+            'Соединение p95, мс': st.column_config.NumberColumn(format="%.1f")
+        }
+    )
+else:
+    st.info("Статистика пока пуста — откройте другие страницы приложения.")
+
+st.header("🔍 Планы медленных запросов")
+
+with stats.lock:
+    plans = dict(stats.plans)
+
+if plans:
+    for statement, captured in sorted(plans.items(), key=lambda item: -item[1]['duration_ms']):
+        with st.expander(f"{captured['duration_ms']:.0f} мс — {statement[:100]}"):
+            st.caption(f"Захвачен {captured['captured'].strftime('%d.%m.%Y %H:%M:%S')}")
+            st.code(statement, language="sql")
+            st.code(captured['plan'])
+elif capture:
+    st.info(f"Запросов медленнее {threshold} мс пока не было.")
+else:
+    st.info("Включите захват EXPLAIN ANALYZE в настройках, чтобы сохранять планы медленных запросов.")
@@ -11,39 +11,18 @@ st.title("🎻 Управление репетициями")
 
 TIME_SLOTS = [time(h) for h in range(8, 24)]
 DURATIONS = [1.0, 1.5, 2.0, 2.5, 3.0, 4.0]
+REPEAT_RULES = {"Не повторять": 0, "Каждую неделю": 1, "Раз в две недели": 2}
 
-@st.cache_data(ttl=1)
 def load_bands():
-    data = rl.run_query("SELECT band_id, band_name FROM bands ORDER BY band_name")
+    data = rl.snapshot("bands")
     return {b['band_name']: b['band_id'] for b in data}, [b['band_name'] for b in data]
 
-@st.cache_data(ttl=1)
-def load_rehearsals_for_day(target_date):
-    start_dt = datetime.combine(target_date, time.min) 
-    end_dt = datetime.combine(target_date, time.max)
-    
-    query = """
-        SELECT r.*, b.band_name
-        FROM rehearsals r
-        JOIN bands b ON r.band_id = b.band_id
-        WHERE r.rehearsal_date BETWEEN %s AND %s
-        ORDER BY r.rehearsal_date
-    """
-    return rl.run_query(query, (start_dt, end_dt))
-
-@st.cache_data(ttl=1)
-def load_future_rehearsals(days=30):
-    start_dt = datetime.combine(date.today(), time.min)
+@rl.cached("rehearsals", "bands")
+def load_future_rehearsals(days, today):
+    start_dt = datetime.combine(today, time.min)
     end_dt = start_dt + timedelta(days=days)
     
-    query = """
-        SELECT r.*, b.band_name
-        FROM rehearsals r
-        JOIN bands b ON r.band_id = b.band_id
-        WHERE r.rehearsal_date BETWEEN %s AND %s
-        ORDER BY r.rehearsal_date
-    """
-    return rl.run_query(query, (start_dt, end_dt))
+    return rl.run_named_df("rehearsals_in_range", (start_dt, end_dt))
 
 try:
     bands_map, bands_list = load_bands()
@@ -64,18 +43,19 @@ with tab1:
     with col1:
         booking_date = st.date_input("Дата репетиции", min_value=date.today())
         
-        occupied = load_rehearsals_for_day(booking_date)
+        calendar = rl.room_calendar(booking_date, booking_date + timedelta(days=6))
+        start_day = datetime.combine(booking_date, time.min)
+        opening, closing = start_day + timedelta(hours=8), start_day + timedelta(hours=23)
+        occupied = calendar.rehearsals(start_day, start_day + timedelta(days=1))
         
         if occupied:
             
             df = pd.DataFrame(occupied)
-            df['start'] = pd.to_datetime(df['rehearsal_date'])
+            df['start'] = df['rehearsal_date']
             df['end'] = df['start'] + pd.to_timedelta(df['duration_minutes'], unit='m')
             df['Зал'] = df['location']
             df['Группа'] = df['band_name']
             
-            start_day = datetime.combine(booking_date, time.min)
-            
             fig = px.timeline(df, x_start="start", x_end="end", y="Зал", color="Группа", 
                               title=f"График занятости на {booking_date.strftime('%d.%m.%Y')}",
                               height=400)
@@ -84,18 +64,38 @@ with tab1:
                 
             fig.update_xaxes(
                 tickformat="%H:%M", 
-                range=[start_day + timedelta(hours=8), start_day + timedelta(hours=23)] # 8:00 - 23:00
+                range=[opening, closing] # 8:00 - 23:00
             )
             st.plotly_chart(fig, use_container_width=True)
+            
+            st.caption("Загрузка залов: " + ", ".join(
+                f"{loc} — {calendar.occupancy(loc, opening, closing):.0%}" for loc in rl.LOCATIONS
+            ))
         else:
             st.info("На этот день репетиций нет. Все залы свободны!")
             
     with col2:
+        duration = st.selectbox("Длительность (часы)*", DURATIONS)
+        location = st.selectbox("Место*", rl.LOCATIONS)
+        repeat = st.selectbox("Повторять", list(REPEAT_RULES))
+        repeat_until, repeat_count = None, None
+        if REPEAT_RULES[repeat]:
+            if st.radio("Окончание серии", ["Количество", "До даты"], horizontal=True) == "Количество":
+                repeat_count = st.number_input("Количество репетиций", min_value=2, max_value=rl.MAX_SERIES_OCCURRENCES, value=4)
+            else:
+                repeat_until = st.date_input("До даты", value=booking_date + timedelta(weeks=12), min_value=booking_date,
+                                             max_value=booking_date + timedelta(weeks=REPEAT_RULES[repeat] * (rl.MAX_SERIES_OCCURRENCES - 1)))
+        
+        free_slots = calendar.free_slots(booking_date, booking_date, int(duration * 60), TIME_SLOTS,
+                                         locations=[location], not_before=datetime.now())
+        free_times = [slot['slot_start'].time() for slot in free_slots]
+        
+        if not free_times:
+            st.warning("Нет свободного времени в выбранном зале на эту дату")
+        
         with st.form("booking_form", clear_on_submit=True):
             band = st.selectbox("Коллектив*", bands_list)
-            start_time = st.selectbox("Время начала*", TIME_SLOTS, format_func=lambda t: t.strftime("%H:%M"))
-            duration = st.selectbox("Длительность (часы)*", DURATIONS)
-            location = st.selectbox("Место*", rl.LOCATIONS)
+            start_time = st.selectbox("Время начала*", free_times, format_func=lambda t: t.strftime("%H:%M"))
             
             submitted = st.form_submit_button("Забронировать", type="primary", use_container_width=True)
             
@@ -104,47 +104,62 @@ with tab1:
                     st.error("❌ Заполните все обязательные поля")
                 else:
                     start_dt = datetime.combine(booking_date, start_time)
-                    end_dt = start_dt + timedelta(hours=duration)
+                    band_id = bands_map[band]
+                    duration_minutes = int(duration * 60)
                     
-                    has_conflict = False
-                    occupied = load_rehearsals_for_day(booking_date)
-                    for r in occupied:
-                        r_start = r['rehearsal_date']
-                        r_end = r_start + timedelta(minutes=r['duration_minutes'])
-                        
-                        if (start_dt < r_end) and (end_dt > r_start) and (location == r['location']):
-                            has_conflict = True
-                            st.error(f"❌ Конфликт с репетицией {r['band_name']} в зале {r['location']}")
-                            break
-                    
-                    if not has_conflict:
-                        band_id = bands_map[band]
-                        duration_minutes = int(duration * 60)
-                        
-                        query = """
-                            INSERT INTO rehearsals (band_id, rehearsal_date, duration_minutes, location) 
-                            VALUES (%s, %s, %s, %s)
-                        """
+                    if REPEAT_RULES[repeat]:
+                        result = rl.book_rehearsal_series(band_id, start_dt, duration_minutes, location,
+                                                          REPEAT_RULES[repeat], until=repeat_until, count=repeat_count)
+                        if result['ok']:
+                            st.toast(f"✅ Забронировано репетиций: {len(result['booked'])}", icon="📅")
+                            if result['truncated']:
+                                st.warning(f"Серия ограничена {rl.MAX_SERIES_OCCURRENCES} репетициями, более поздние даты не забронированы")
+                            if result['conflicts']:
+                                st.warning("Пропущены из-за конфликтов:\n" + "\n".join(
+                                    f"- {r['start_at'].strftime('%d.%m.%Y %H:%M')} — занято ({r['band_name']}, "
+                                    f"{r['rehearsal_date'].strftime('%H:%M')})"
+                                    for r in result['conflicts']
+                                ))
+                        else:
+                            st.error("❌ Ошибка при бронировании серии")
+                    else:
+                        conflicts = calendar.overlaps(location, start_dt, start_dt + timedelta(minutes=duration_minutes))
+                        result = {"ok": False, "conflicts": conflicts} if conflicts else rl.book_rehearsal(band_id, start_dt, duration_minutes, location)
                         
-                        if rl.execute_non_query(query, (band_id, start_dt, duration_minutes, location)):
+                        if result['ok']:
                             st.toast("✅ Репетиция забронирована!", icon="📅")
-                            load_rehearsals_for_day.clear()
-                            load_future_rehearsals.clear()
+                        elif result['conflicts']:
+                            r = result['conflicts'][0]
+                            st.error(f"❌ Конфликт с репетицией {r['band_name']} в зале {r['location']}")
                         else:
                             st.error("❌ Ошибка при бронировании")
+    
+    with st.expander("🔎 Свободное время на неделю вперед"):
+        search_locations = st.multiselect("Залы", rl.LOCATIONS, default=rl.LOCATIONS)
+        week_slots = calendar.free_slots(booking_date, booking_date + timedelta(days=6), int(duration * 60), TIME_SLOTS,
+                                         locations=search_locations, not_before=datetime.now())
+        
+        if week_slots:
+            df_slots = pd.DataFrame(week_slots)
+            df_slots['День'] = df_slots['slot_start'].dt.strftime('%d.%m.%Y')
+            df_slots['Время'] = df_slots['slot_start'].dt.strftime('%H:%M')
+            df_week = df_slots.groupby(['День', 'location'], sort=False)['Время'].agg(', '.join).unstack(fill_value='—')
+            st.dataframe(df_week, use_container_width=True)
+        else:
+            st.info(f"Нет свободных слотов длительностью {duration} ч на ближайшую неделю")
 
 with tab2:
     st.subheader("Расписание репетиций")
     
     days = st.slider("Показать на дней вперед", 1, 90, 30)
     
-    rehearsals = load_future_rehearsals(days)
+    rehearsals = load_future_rehearsals(days, date.today())
     
-    if rehearsals:
-        df = pd.DataFrame(rehearsals)
-        df['Дата и время'] = pd.to_datetime(df['rehearsal_date']).dt.strftime('%d.%m.%Y %H:%M')
+    if not rehearsals.empty:
+        df = rehearsals
+        df['Дата и время'] = df['rehearsal_date'].dt.strftime('%d.%m.%Y %H:%M')
         df['Продолжительность (ч)'] = (df['duration_minutes'] / 60).round(1)
-        df['Конец'] = pd.to_datetime(df['rehearsal_date']) + pd.to_timedelta(df['duration_minutes'], unit='m')
+        df['Конец'] = df['rehearsal_date'] + pd.to_timedelta(df['duration_minutes'], unit='m')
         df['Конец'] = df['Конец'].dt.strftime('%H:%M')
         
         col1, col2 = st.columns(2)
@@ -181,7 +196,7 @@ with tab2:
 with tab3:
     st.subheader("Управление репетициями")
     
-    rehearsals = load_future_rehearsals(90)
+    rehearsals = load_future_rehearsals(90, date.today()).to_dict('records')
     
     if not rehearsals:
         st.info("Нет активных репетиций")
@@ -230,44 +245,29 @@ with tab3:
                         new_dt = datetime.combine(new_date, new_time)
                         new_minutes = int(new_duration * 60)
                         
-                        occupied = load_rehearsals_for_day(new_date)
-                        occupied = [r for r in occupied if r['rehearsal_id'] != rehearsal['rehearsal_id']]
-                        
-                        has_conflict = False
-                        for r in occupied:
-                            r_start = r['rehearsal_date']
-                            r_end = r_start + timedelta(minutes=r['duration_minutes'])
-                            new_end = new_dt + timedelta(minutes=new_minutes)
-                            
-                            if (new_dt < r_end) and (new_end > r_start) and (new_location == r['location']):
-                                has_conflict = True
-                                st.error(f"❌ Конфликт с репетицией {r['band_name']} в зале {r['location']}")
-                                break
+                        conflicts = rl.room_calendar(new_date).overlaps(new_location, new_dt, new_dt + timedelta(minutes=new_minutes),
+                                                                        exclude_id=rehearsal['rehearsal_id'])
+                        if conflicts:
+                            result = {"ok": False, "conflicts": conflicts}
+                        else:
+                            result = rl.book_rehearsal(rehearsal['band_id'], new_dt, new_minutes, new_location,
+                                                       rehearsal_id=rehearsal['rehearsal_id'])
                         
-                        if not has_conflict:
-                            query = """
-                                UPDATE rehearsals 
-                                SET rehearsal_date=%s, duration_minutes=%s, location=%s 
-                                WHERE rehearsal_id=%s
-                            """
-                            
-                            if rl.execute_non_query(query, (new_dt, new_minutes, new_location, rehearsal['rehearsal_id'])):
-                                st.toast("✅ Репетиция обновлена!", icon="📝")
-                                load_rehearsals_for_day.clear()
-                                load_future_rehearsals.clear()
-                                st.rerun()
-                            else:
-                                st.error("❌ Ошибка при обновлении")
+                        if result['ok']:
+                            st.toast("✅ Репетиция обновлена!", icon="📝")
+                            st.rerun()
+                        elif result['conflicts']:
+                            r = result['conflicts'][0]
+                            st.error(f"❌ Конфликт с репетицией {r['band_name']} в зале {r['location']}")
+                        else:
+                            st.error("❌ Ошибка при обновлении")
             
             with col2:
                 st.markdown("### Действия")
                 
                 if st.button("❌ Отменить репетицию", type="secondary", use_container_width=True):
-                    query = "DELETE FROM rehearsals WHERE rehearsal_id = %s"
-                    if rl.execute_non_query(query, (rehearsal['rehearsal_id'],)):
+                    if rl.delete_many("rehearsals", [rehearsal['rehearsal_id']]) is not None:
                         st.toast("✅ Репетиция отменена!", icon="🗑️")
-                        load_rehearsals_for_day.clear()
-                        load_future_rehearsals.clear()
                         st.rerun()
                     else:
                         st.error("❌ Ошибка при отмене")
\ No newline at end of file
@@ -1,8 +1,9 @@
 import streamlit as st
 import rac_lib as rl
-import pandas as pd
 import plotly.express as px
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date, time
+import tempfile
+from functools import partial
 
 st.set_page_config(page_title="Отчёты", page_icon="📊", layout="wide")
 rl.sidebar_pg()
@@ -12,7 +13,7 @@ st.title("📊 Отчёты")
 st.sidebar.header("Настройки")
 period = st.sidebar.selectbox("Период", ["За все время", "За месяц", "За 3 месяца", "За год"])
 
-end_date = datetime.now()
+end_date = datetime.combine(date.today(), time.min)
 if period == "За месяц":
     start_date = end_date - timedelta(days=30)
 elif period == "За 3 месяца":
@@ -22,22 +23,20 @@ elif period == "За год":
 else:
     start_date = datetime(2000, 1, 1)
 
-st.header("🎻 Активность репетиций (часы)")
+if period == "За все время":
+    load_rehearsals = partial(rl.run_named_df, "top_bands_all_time")
+else:
+    load_rehearsals = partial(rl.run_named_df, "rehearsal_hours_by_band", (start_date,))
 
-query_rehearsals = """
-    SELECT b.band_name, COUNT(*) as count, SUM(r.duration_minutes)/60.0 as hours
-    FROM rehearsals r
-    JOIN bands b ON r.band_id = b.band_id
-    WHERE r.rehearsal_date >= %s
-    GROUP BY b.band_name
-    ORDER BY hours DESC LIMIT 10
-"""
+df_rehearsals, df_solo, df_genres = rl.gather(
+    load_rehearsals,
+    partial(rl.run_named_df, "solo_musicians"),
+    partial(rl.run_named_df, "genre_counts")
+)
 
-rehearsals_data = rl.run_query(query_rehearsals, (start_date,))
+st.header("🎻 Активность репетиций (часы)")
 
-if rehearsals_data:
-    df_rehearsals = pd.DataFrame(rehearsals_data)
-    
+if not df_rehearsals.empty:
     fig = px.bar(df_rehearsals, x='band_name', y='hours', 
                  title=f"Топ-10 групп по часам репетиций ({period})", 
                  labels={'band_name':'Группа', 'hours':'Часы'})
@@ -49,17 +48,7 @@ st.markdown("---")
 
 st.header("👥 Свободные музыканты (без коллектива)")
 
-query_solo = """
-    SELECT first_name, last_name, instrument, phone 
-    FROM musicians m LEFT JOIN band_membership bm ON m.musician_id = bm.musician_id 
-    WHERE bm.musician_id IS NULL
-    ORDER BY last_name
-"""
-
-solo = rl.run_query(query_solo)
-
-if solo:
-    df_solo = pd.DataFrame(solo)
+if not df_solo.empty:
     df_solo['instrument'] = df_solo['instrument'].map(lambda x: rl.INSTRUMENTS_REVERSE.get(x, x))
     
     st.dataframe(
@@ -80,18 +69,7 @@ st.markdown("---")
 
 st.header("🎸 Распределение по жанрам")
 
-query_genres = """
-    SELECT genre, COUNT(*) as count
-    FROM bands
-    GROUP BY genre
-    ORDER BY count DESC
-"""
-
-genres_data = rl.run_query(query_genres)
-
-if genres_data:
-    df_genres = pd.DataFrame(genres_data)
-    
+if not df_genres.empty:
     df_genres['Жанр'] = df_genres['genre'].map(lambda x: rl.GENRES_REVERSE.get(x, x))
     
     col1, col2 = st.columns(2)
@@ -107,4 +85,30 @@ if genres_data:
                      title='Доля коллективов по жанрам', hole=0.3)
         st.plotly_chart(fig, use_container_width=True)
 else:
-    st.info("Нет данных о жанрах.")
\ No newline at end of file
+    st.info("Нет данных о жанрах.")
+
+st.markdown("---")
+
+st.header("📤 Экспорт данных")
+
+col1, col2 = st.columns(2)
+with col1:
+    export_name = st.selectbox("Набор данных", list(rl.EXPORTS), format_func=lambda name: rl.EXPORTS[name][0])
+with col2:
+    export_format = st.radio("Формат", rl.EXPORT_FORMATS, horizontal=True)
+
+if st.button("Подготовить файл"):
+    with tempfile.TemporaryFile() as export_file:
+        with st.spinner("Выгрузка..."):
+            exported = rl.export_dataset(export_name, export_format, export_file)
+        if exported is not None and export_file.tell() > rl.EXPORT_DOWNLOAD_MAX_BYTES:
+            st.warning(f"Выгрузка слишком большая для скачивания из браузера ({exported} строк). Выполните в консоли:")
+            st.code(f"uv run python export_data.py {export_name} {export_format} {export_name}.{export_format}", language="bash")
+        elif exported is not None:
+            export_file.seek(0)
+            st.download_button(
+                f"⬇️ Скачать ({exported} строк)",
+                export_file,
+                file_name=f"{export_name}_{date.today().isoformat()}.{export_format}",
+                mime="text/csv" if export_format == "csv" else "application/octet-stream"
+            )
@@ -1,9 +1,28 @@
 import streamlit as st 
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
 import psycopg2 
+import psycopg2.pool
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.errors
+from psycopg2 import sql
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta 
 import time 
+import threading
+import os
+import re
+import select
+import functools
+import io
+import bisect
+from collections import deque
+import uuid
 
 LOCATIONS = ['Большой зал', 'Малый зал', 'Студия А', 'Студия Б']
 
@@ -26,76 +45,1442 @@ GENRES = {
 GENRES_REVERSE = {v: k for k, v in GENRES.items()}
 GENRES_LIST = list(GENRES.keys())
 
-def init_connection():
-    try:
-        conn = psycopg2.connect(
-            host="localhost", 
-            database="concerts and rehearsals", 
-            user="postgres", 
-            password="",
-            port=5432
+PHONE_PATTERN = r'^\+375[0-9]{9}$'
+
+CATEGORICAL_COLUMNS = ("instrument", "genre", "location")
+
+INT_TYPES = {20, 21, 23}
+FLOAT_TYPES = {700, 701, 1700}
+TIMESTAMPTZ_TYPE = 1184
+DATETIME_TYPES = {1082, 1114, TIMESTAMPTZ_TYPE}
+BOOL_TYPE = 16
+
+EXPORT_FORMATS = ["csv", "parquet"]
+
+EXPORTS = {
+    "musicians": ("Музыканты", """
+        SELECT musician_id, first_name, last_name, instrument, phone, telegram
+        FROM musicians
+        ORDER BY last_name, first_name
+    """),
+    "concerts": ("Концерты с составом", """
+        SELECT c.concert_id, c.concert_title, c.venue_address, c.concert_date,
+               p.performance_order, b.band_name
+        FROM concerts c
+        LEFT JOIN performances p ON c.concert_id = p.concert_id
+        LEFT JOIN bands b ON p.band_id = b.band_id
+        ORDER BY c.concert_date, c.concert_id, p.performance_order
+    """),
+    "rehearsals": ("История репетиций", """
+        SELECT r.rehearsal_id, r.rehearsal_date, r.duration_minutes, r.location, b.band_name
+        FROM rehearsals r
+        JOIN bands b ON r.band_id = b.band_id
+        ORDER BY r.rehearsal_date
+    """)
+}
+
+DB_PARAMS = {
+    "host": "localhost",
+    "database": "concerts and rehearsals",
+    "user": "postgres",
+    "password": "",
+    "port": 5432
+}
+
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 10
+POOL_TIMEOUT = 10
+POOL_HEALTHCHECK_AFTER = 30
+
+BULK_PAGE_SIZE = 1000
+FETCH_CHUNK = 10000
+STREAM_ITERSIZE = 5000
+EXPORT_DOWNLOAD_MAX_BYTES = 50 * 1024 * 1024
+IMPORT_CHUNK = 5000
+PAGE_SIZE = 50
+CALENDAR_DAYS = 28
+MAX_SERIES_OCCURRENCES = 52
+SERIES_RETRIES = 2
+CALENDAR_MARGIN = timedelta(days=1)
+CALENDAR_CACHE_ENTRIES = 32
+SEARCH_LIMIT = 100
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATIONS_LOCK_ID = 72010001
+
+CACHE_TTL = 3600
+STATS_SAMPLES = 1000
+EXPLAIN_ABOVE_MS = 500
+ESTIMATE_COUNTS_ABOVE = 100000
+CHANGES_CHANNEL = "rac_table_changes"
+LISTEN_TIMEOUT = 5
+LISTEN_RETRY_DELAY = 5
+
+DERIVED_TABLES = {
+    "bands": ["band_stats", "band_summary"],
+    "band_membership": ["band_stats", "band_summary"],
+    "rehearsals": ["band_stats", "band_summary", "rehearsal_daily_rollup"],
+    "band_stats": ["band_summary"]
+}
+
+PRIMARY_KEYS = {
+    "bands": "band_id",
+    "musicians": "musician_id",
+    "concerts": "concert_id",
+    "rehearsals": "rehearsal_id",
+    "performances": "performance_id"
+}
+
+CASCADE_TABLES = {
+    "bands": ["band_membership", "performances", "rehearsals"],
+    "musicians": ["band_membership"],
+    "concerts": ["performances"]
+}
+
+QUERIES = {
+    "upcoming_events": """
+        SELECT '🎭' as icon, concert_title as title, concert_date as dt, venue_address as loc, 'Концерт' as type
+        FROM concerts WHERE concert_date BETWEEN %s AND %s
+        UNION ALL
+        SELECT '🎻', b.band_name, r.rehearsal_date, r.location, 'Репетиция'
+        FROM rehearsals r JOIN bands b ON r.band_id = b.band_id
+        WHERE r.rehearsal_date BETWEEN %s AND %s
+        ORDER BY dt
+    """,
+    "rehearsals_in_range": """
+        SELECT r.*, b.band_name
+        FROM rehearsals r
+        JOIN bands b ON r.band_id = b.band_id
+        WHERE r.rehearsal_date BETWEEN %s AND %s
+        ORDER BY r.rehearsal_date
+    """,
+    "rehearsal_hours_by_band": """
+        SELECT b.band_name, SUM(d.rehearsals_count) as count, SUM(d.total_minutes)/60.0 as hours
+        FROM rehearsal_daily_rollup d
+        JOIN bands b ON d.band_id = b.band_id
+        WHERE d.day >= %s::date
+        GROUP BY b.band_name
+        ORDER BY hours DESC LIMIT 10
+    """,
+    "top_bands_all_time": """
+        SELECT b.band_name, s.rehearsals_count as count, s.total_minutes/60.0 as hours
+        FROM band_stats s
+        JOIN bands b ON s.band_id = b.band_id
+        WHERE s.rehearsals_count > 0
+        ORDER BY s.total_minutes DESC LIMIT 10
+    """,
+    "solo_musicians": """
+        SELECT first_name, last_name, instrument, phone
+        FROM musicians m
+        WHERE NOT EXISTS (SELECT 1 FROM band_membership bm WHERE bm.musician_id = m.musician_id)
+        ORDER BY last_name
+    """,
+    "rehearsal_conflicts": """
+        SELECT r.*, b.band_name
+        FROM rehearsals r
+        JOIN bands b ON r.band_id = b.band_id
+        WHERE r.location = %s
+          AND tsrange(r.rehearsal_date, r.rehearsal_date + r.duration_minutes * interval '1 minute') && tsrange(%s, %s)
+          AND r.rehearsal_id IS DISTINCT FROM %s
+        ORDER BY r.rehearsal_date
+    """,
+    "dashboard_stats": """
+        SELECT
+            (SELECT CASE WHEN reltuples >= %(estimate_above)s THEN reltuples::bigint
+                         ELSE (SELECT COUNT(*) FROM public.musicians) END
+             FROM pg_class WHERE oid = 'public.musicians'::regclass) AS musicians,
+            (SELECT CASE WHEN reltuples >= %(estimate_above)s THEN reltuples::bigint
+                         ELSE (SELECT COUNT(*) FROM public.bands) END
+             FROM pg_class WHERE oid = 'public.bands'::regclass) AS bands,
+            (SELECT CASE WHEN reltuples >= %(estimate_above)s THEN reltuples::bigint
+                         ELSE (SELECT COUNT(*) FROM public.concerts) END
+             FROM pg_class WHERE oid = 'public.concerts'::regclass) AS concerts,
+            (SELECT CASE WHEN reltuples >= %(estimate_above)s THEN reltuples::bigint
+                         ELSE (SELECT COUNT(*) FROM public.rehearsals) END
+             FROM pg_class WHERE oid = 'public.rehearsals'::regclass) AS rehearsals
+    """,
+    "search_musicians": """
+        SELECT musician_id, first_name, last_name, instrument, phone, telegram,
+               similarity(last_name || ' ' || first_name || ' ' || phone || ' ' || COALESCE(telegram, ''), %(q)s) AS rank
+        FROM musicians
+        WHERE (last_name || ' ' || first_name || ' ' || phone || ' ' || COALESCE(telegram, '')) ILIKE %(pattern)s
+           OR %(q)s <%% (last_name || ' ' || first_name || ' ' || phone || ' ' || COALESCE(telegram, ''))
+           OR instrument = ANY(%(instruments)s)
+        ORDER BY rank DESC, last_name, first_name
+        LIMIT %(limit)s
+    """,
+    "search_concerts": """
+        SELECT c.concert_id, c.concert_title, c.venue_address, c.concert_date, l.band_count, l.bands_list,
+               ts_rank(c.search_vector, websearch_to_tsquery('russian', %(q)s))
+                 + similarity(c.concert_title || ' ' || c.venue_address, %(q)s) AS rank
+        FROM concerts c
+        LEFT JOIN LATERAL (
+            SELECT COUNT(*) as band_count,
+                   STRING_AGG(b.band_name, ', ' ORDER BY p.performance_order) as bands_list
+            FROM performances p
+            JOIN bands b ON p.band_id = b.band_id
+            WHERE p.concert_id = c.concert_id
+        ) l ON true
+        WHERE c.search_vector @@ websearch_to_tsquery('russian', %(q)s)
+           OR (c.concert_title || ' ' || c.venue_address) ILIKE %(pattern)s
+        ORDER BY rank DESC, c.concert_date DESC
+        LIMIT %(limit)s
+    """,
+    "band_members": """
+        SELECT m.first_name, m.last_name, m.instrument, bm.musician_id
+        FROM band_membership bm JOIN musicians m ON bm.musician_id = m.musician_id
+        WHERE bm.band_id = %s ORDER BY m.last_name
+    """,
+    "concert_lineup": """
+        SELECT b.band_name, p.performance_order
+        FROM performances p
+        JOIN bands b ON p.band_id = b.band_id
+        WHERE p.concert_id = %s
+        ORDER BY p.performance_order NULLS LAST, b.band_name
+    """
+}
+
+LIST_QUERIES = {
+    "bands": "SELECT * FROM bands ORDER BY band_name",
+    "musicians": """
+        SELECT musician_id, first_name, last_name, instrument, phone, telegram
+        FROM musicians
+        ORDER BY last_name, first_name
+    """,
+    "available_musicians": """
+        SELECT musician_id, first_name, last_name, instrument FROM musicians
+        WHERE musician_id NOT IN (SELECT musician_id FROM band_membership WHERE band_id = %s)
+        ORDER BY last_name
+    """,
+    "concerts": """
+        SELECT concert_id, concert_title, venue_address, concert_date
+        FROM concerts
+        ORDER BY concert_date DESC
+    """,
+    "genre_counts": """
+        SELECT genre, COUNT(*) as count
+        FROM bands
+        GROUP BY genre
+        ORDER BY count DESC
+    """
+}
+
+MUSICIANS_LIST_QUERY = """
+    SELECT musician_id, first_name, last_name, instrument, phone, telegram
+    FROM musicians
+"""
+MUSICIANS_SORT_KEYS = ("last_name", "first_name", "musician_id")
+
+BANDS_LIST_QUERY = """
+    SELECT s.*, n.next_rehearsal
+    FROM band_summary s
+    LEFT JOIN LATERAL (
+        SELECT MIN(r.rehearsal_date) AS next_rehearsal
+        FROM rehearsals r
+        WHERE r.band_id = s.band_id AND r.rehearsal_date >= %s
+    ) n ON true
+"""
+BANDS_SORT_KEYS = ("band_name", "band_id")
+
+CONCERTS_LIST_QUERY = """
+    SELECT c.concert_id, c.concert_title, c.venue_address, c.concert_date, l.band_count, l.bands_list
+    FROM concerts c
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) as band_count,
+               STRING_AGG(b.band_name, ', ' ORDER BY p.performance_order) as bands_list
+        FROM performances p
+        JOIN bands b ON p.band_id = b.band_id
+        WHERE p.concert_id = c.concert_id
+    ) l ON true
+"""
+CONCERTS_SORT_KEYS = ("concert_date", "concert_id")
+
+WRITE_QUERIES = {
+    "book_series": """
+        WITH occurrences AS (
+            SELECT o.start_at, o.start_at + %(duration)s::integer * interval '1 minute' AS end_at
+            FROM unnest(%(starts)s::timestamp[]) AS o(start_at)
+        ),
+        conflicts AS (
+            SELECT o.start_at, r.rehearsal_id, r.rehearsal_date, r.duration_minutes, b.band_name
+            FROM occurrences o
+            JOIN rehearsals r ON r.location = %(location)s::varchar
+             AND tsrange(r.rehearsal_date, r.rehearsal_date + r.duration_minutes * interval '1 minute')
+                 && tsrange(o.start_at, o.end_at)
+            JOIN bands b ON r.band_id = b.band_id
+        ),
+        inserted AS (
+            INSERT INTO rehearsals (band_id, rehearsal_date, duration_minutes, location)
+            SELECT %(band_id)s::integer, o.start_at, %(duration)s::integer, %(location)s::varchar
+            FROM occurrences o
+            WHERE NOT EXISTS (SELECT 1 FROM conflicts c WHERE c.start_at = o.start_at)
+            RETURNING rehearsal_id, rehearsal_date, duration_minutes
         )
-        return conn
+        SELECT 'booked' AS status, i.rehearsal_date AS start_at, i.rehearsal_id, i.rehearsal_date,
+               i.duration_minutes, NULL AS band_name
+        FROM inserted i
+        UNION ALL
+        SELECT 'conflict', c.start_at, c.rehearsal_id, c.rehearsal_date, c.duration_minutes, c.band_name
+        FROM conflicts c
+        ORDER BY start_at, rehearsal_date
+    """
+}
+
+STATEMENTS = {**QUERIES, **LIST_QUERIES, **WRITE_QUERIES}
+
+class NoConnectionError(psycopg2.InterfaceError):
+    pass
+
+def _migration_files():
+    migrations = []
+    for file_name in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = re.match(r'^(\d+)_(\w+)\.sql$', file_name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, file_name)))
+    return migrations
+
+def apply_migrations(conn):
+    applied_now = []
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATIONS_LOCK_ID,))
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS public.schema_migrations (
+                    version integer PRIMARY KEY,
+                    name character varying(255) NOT NULL,
+                    applied_at timestamp without time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
+                )
+            """)
+            cursor.execute("SELECT version FROM public.schema_migrations")
+            applied = {row[0] for row in cursor.fetchall()}
+            conn.commit()
+
+            for version, name, path in _migration_files():
+                if version in applied:
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    cursor.execute(f.read())
+                cursor.execute("INSERT INTO public.schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+                conn.commit()
+                applied_now.append(name)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATIONS_LOCK_ID,))
+            conn.commit()
+    return applied_now
+
+@st.cache_resource
+def _table_versions():
+    return {}
+
+def _bump_versions(versions, tables):
+    tables = set(tables)
+    for table in list(tables):
+        tables.update(DERIVED_TABLES.get(table, ()))
+    for table in tables:
+        versions[table] = versions.get(table, 0) + 1
+
+def invalidate_tables(tables):
+    _bump_versions(_table_versions(), tables)
+
+def get_table_versions(tables):
+    versions = _table_versions()
+    return tuple((table, versions.get(table, 0)) for table in sorted(set(tables) | {"*"}))
+
+def _listen_for_changes(versions):
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(**DB_PARAMS)
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANGES_CHANNEL}")
+            _bump_versions(versions, ["*"])
+
+            while True:
+                if select.select([conn], [], [], LISTEN_TIMEOUT) == ([], [], []):
+                    continue
+                conn.poll()
+                tables = {notify.payload for notify in conn.notifies}
+                conn.notifies.clear()
+                _bump_versions(versions, tables)
+        except Exception:
+            time.sleep(LISTEN_RETRY_DELAY)
+        finally:
+            if conn is not None:
+                conn.close()
+
+@st.cache_resource
+def _start_change_listener():
+    listener = threading.Thread(target=_listen_for_changes, args=(_table_versions(),),
+                                name="rac-change-listener", daemon=True)
+    listener.start()
+    return listener
+
+class PooledConnection(psycopg2.extensions.connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.last_used = 0
+
+class WarmConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    def _putconn(self, conn, key=None, close=False):
+        minconn, self.minconn = self.minconn, self.maxconn
+        try:
+            super()._putconn(conn, key, close)
+        finally:
+            self.minconn = minconn
+
+@st.cache_resource
+def _create_pool(minconn, maxconn):
+    pool = WarmConnectionPool(minconn, maxconn, connection_factory=PooledConnection, **DB_PARAMS)
+    conn = pool.getconn()
+    try:
+        apply_migrations(conn)
+    except Exception:
+        pool.closeall()
+        raise
+    pool.putconn(conn)
+    _start_change_listener()
+    pool.slots = threading.BoundedSemaphore(maxconn)
+    pool.unpreparable = set()
+    return pool
+
+def get_pool(minconn=POOL_MIN_CONN, maxconn=POOL_MAX_CONN):
+    try:
+        return _create_pool(minconn, maxconn)
     except Exception as e:
         st.error(f"❌ Ошибка подключения к базе данных: {e}")
         st.info("Проверьте, запущен ли PostgreSQL, и обновите учетные данные.")
         return None
 
-@st.cache_data(ttl=1)
-def run_query(query, params=None):
-    conn = init_connection()
-    if conn is None:
-        return []
-        
-    cursor = conn.cursor()
+def _is_healthy(pool, conn):
+    if conn.closed:
+        return False
+    if conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+        return False
+    if time.monotonic() - conn.last_used < POOL_HEALTHCHECK_AFTER:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+def _checkout(pool):
+    if not pool.slots.acquire(timeout=POOL_TIMEOUT):
+        raise psycopg2.pool.PoolError("все соединения пула заняты")
     try:
-        cursor.execute(query, params or ())
-        if cursor.description:
-            column_names = [desc[0] for desc in cursor.description]
-            results = [dict(zip(column_names, row)) for row in cursor.fetchall()]
-            return results
+        for _ in range(pool.maxconn + 1):
+            conn = pool.getconn()
+            if _is_healthy(pool, conn):
+                return conn
+            pool.putconn(conn, close=True)
+        raise psycopg2.pool.PoolError("не удалось получить рабочее соединение")
+    except Exception:
+        pool.slots.release()
+        raise
+
+def _release(pool, conn):
+    try:
+        broken = conn.closed or conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+        if not broken and conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        if not broken:
+            conn.last_used = time.monotonic()
+        pool.putconn(conn, close=broken)
+    finally:
+        pool.slots.release()
+
+@contextmanager
+def connection():
+    pool = get_pool()
+    if pool is None:
+        yield None
+        return
+
+    try:
+        conn = _checkout(pool)
+    except Exception as e:
+        st.error(f"❌ Ошибка подключения к базе данных: {e}")
+        yield None
+        return
+
+    try:
+        yield conn
+    finally:
+        _release(pool, conn)
+
+def _fetch_dicts(cursor):
+    if not cursor.description:
         return []
+    column_names = [desc[0] for desc in cursor.description]
+    return [dict(zip(column_names, row)) for row in cursor.fetchall()]
+
+def _read_tables(query):
+    return set(re.findall(r'\b(?:FROM|JOIN)\s+(?:"?public"?\.)?"?(\w+)"?', query, re.IGNORECASE))
+
+def _written_tables(query):
+    return set(re.findall(r'\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE)\s+(?:ONLY\s+)?(?:"?public"?\.)?"?(\w+)"?', query, re.IGNORECASE))
+
+def cached(*tables, ttl=CACHE_TTL):
+    def decorator(func):
+        loader = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def versioned(*args, table_versions=None, **kwargs):
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            rows = len(result) if isinstance(result, (list, tuple, dict, pd.DataFrame)) else 1
+            query_stats().record_execution(loader, time.perf_counter() - start, rows, counted=True)
+            return result
+
+        cached_func = st.cache_data(ttl=ttl)(versioned)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            query_stats().record_call(loader)
+            return cached_func(*args, table_versions=get_table_versions(tables), **kwargs)
+
+        wrapper.clear = cached_func.clear
+        return wrapper
+    return decorator
+
+def _column_series(values, type_code, categorical):
+    if type_code in INT_TYPES:
+        return pd.Series(values, dtype="Int64" if None in values else "int64")
+    if type_code in FLOAT_TYPES:
+        return pd.Series(values, dtype="float64")
+    if type_code in DATETIME_TYPES:
+        return pd.Series(pd.to_datetime(values, utc=type_code == TIMESTAMPTZ_TYPE))
+    if categorical:
+        return pd.Series(values, dtype="category")
+    return pd.Series(values, dtype=object)
+
+def _frame_from_columns(description, columns, categories=CATEGORICAL_COLUMNS):
+    return pd.DataFrame({
+        desc.name: _column_series(values, desc.type_code, desc.name in categories)
+        for desc, values in zip(description, columns)
+    })
+
+def _fetch_frame(cursor, categories=CATEGORICAL_COLUMNS):
+    if not cursor.description:
+        return pd.DataFrame()
+
+    columns = [[] for _ in cursor.description]
+    while True:
+        rows = cursor.fetchmany(FETCH_CHUNK)
+        if not rows:
+            break
+        for column, values in zip(columns, zip(*rows)):
+            column.extend(values)
+
+    return _frame_from_columns(cursor.description, columns, categories)
+
+def _arrow_type(type_code):
+    if type_code in INT_TYPES:
+        return pa.int64()
+    if type_code in FLOAT_TYPES:
+        return pa.float64()
+    if type_code == TIMESTAMPTZ_TYPE:
+        return pa.timestamp("ns", tz="UTC")
+    if type_code in DATETIME_TYPES:
+        return pa.timestamp("ns")
+    if type_code == BOOL_TYPE:
+        return pa.bool_()
+    return pa.string()
+
+def normalize_sql(query):
+    query = re.sub(r"'(?:[^']|'')*'", "?", query)
+    query = re.sub(r"\b\d+\b", "?", query)
+    query = re.sub(r"\(\s*%s(?:\s*,\s*%s)+\s*\)", "(...)", query)
+    return " ".join(query.split())
+
+class QueryStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statements = {}
+        self.plans = {}
+        self.explain_above_ms = None
+
+    def _entry(self, query):
+        statement = normalize_sql(query)
+        entry = self.statements.get(statement)
+        if entry is None:
+            entry = self.statements[statement] = {
+                "calls": 0,
+                "executions": 0,
+                "rows": 0,
+                "latency": deque(maxlen=STATS_SAMPLES),
+                "acquire": deque(maxlen=STATS_SAMPLES)
+            }
+        return entry
+
+    def record_call(self, query):
+        with self.lock:
+            self._entry(query)["calls"] += 1
+
+    def record_execution(self, query, duration, rows, acquire=None, counted=False):
+        with self.lock:
+            entry = self._entry(query)
+            if not counted:
+                entry["calls"] += 1
+            entry["executions"] += 1
+            entry["rows"] += max(rows, 0)
+            entry["latency"].append(duration * 1000)
+            if acquire is not None:
+                entry["acquire"].append(acquire * 1000)
+
+    def should_explain(self, query, duration):
+        return (self.explain_above_ms is not None
+                and duration * 1000 >= self.explain_above_ms
+                and normalize_sql(query) not in self.plans)
+
+    def record_plan(self, query, duration, plan):
+        with self.lock:
+            self.plans[normalize_sql(query)] = {"duration_ms": duration * 1000, "captured": datetime.now(), "plan": plan}
+
+    def reset(self):
+        with self.lock:
+            self.statements.clear()
+            self.plans.clear()
+
+    def snapshot(self):
+        with self.lock:
+            items = [(statement, dict(entry, latency=list(entry["latency"]), acquire=list(entry["acquire"])))
+                     for statement, entry in self.statements.items()]
+
+        records = []
+        for statement, entry in items:
+            latency = pd.Series(entry["latency"], dtype="float64")
+            acquire = pd.Series(entry["acquire"], dtype="float64")
+            records.append({
+                "statement": statement,
+                "calls": entry["calls"],
+                "cache_hits": entry["calls"] - entry["executions"],
+                "cache_misses": entry["executions"],
+                "p50_ms": latency.quantile(0.5),
+                "p95_ms": latency.quantile(0.95),
+                "p99_ms": latency.quantile(0.99),
+                "rows": entry["rows"],
+                "acquire_p95_ms": acquire.quantile(0.95)
+            })
+        return pd.DataFrame(records)
+
+@st.cache_resource
+def query_stats():
+    return QueryStats()
+
+def _explain_analyze(cursor, query, params):
+    try:
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params or ())
+        return "\n".join(row[0] for row in cursor.fetchall())
     except Exception as e:
-        st.error(f"❌ Ошибка выполнения запроса: {e}")
+        return f"EXPLAIN не выполнен: {e}"
+
+@functools.lru_cache(maxsize=None)
+def _prepared_sql(name):
+    names = []
+
+    def placeholder(match):
+        if match.group(0) == "%%":
+            return "%"
+        key = match.group(1)
+        if key is None or key not in names:
+            names.append(key)
+            return f"${len(names)}"
+        return f"${names.index(key) + 1}"
+
+    return re.sub(r"%%|%s|%\((\w+)\)s", placeholder, STATEMENTS[name]), names
+
+def _statement_args(names, params):
+    if isinstance(params, dict):
+        return [params[name] for name in names]
+    return list(params or ())
+
+def _execute_named(conn, cursor, name, params=None):
+    pool = get_pool()
+    statement = f"rac_{name}"
+    body, names = _prepared_sql(name)
+    fresh = conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    if name not in conn.prepared and name not in pool.unpreparable:
+        cursor.execute("SAVEPOINT rac_prepare")
+        try:
+            cursor.execute(f"PREPARE {statement} AS {body}")
+            conn.prepared.add(name)
+        except psycopg2.Error:
+            cursor.execute("ROLLBACK TO SAVEPOINT rac_prepare")
+            pool.unpreparable.add(name)
+        cursor.execute("RELEASE SAVEPOINT rac_prepare")
+
+    if name not in conn.prepared:
+        cursor.execute(STATEMENTS[name], params or ())
+        return
+
+    args = _statement_args(names, params)
+    placeholders = ", ".join(["%s"] * len(args))
+    try:
+        cursor.execute(f"EXECUTE {statement} ({placeholders})" if args else f"EXECUTE {statement}", args)
+    except psycopg2.errors.InvalidSqlStatementName:
+        conn.prepared.discard(name)
+        if not fresh:
+            raise
+        conn.rollback()
+        _execute_named(conn, cursor, name, params)
+
+def _execute_query(query, params, as_frame=False, name=None):
+    stats = query_stats()
+    requested = time.perf_counter()
+    with connection() as conn:
+        if conn is None:
+            raise NoConnectionError("нет соединения с базой данных")
+        acquired = time.perf_counter()
+
+        with conn.cursor() as cursor:
+            if name is None:
+                cursor.execute(query, params or ())
+            else:
+                _execute_named(conn, cursor, name, params)
+            result = _fetch_frame(cursor) if as_frame else _fetch_dicts(cursor)
+            duration = time.perf_counter() - acquired
+            stats.record_execution(query, duration, len(result), acquire=acquired - requested, counted=True)
+            if stats.should_explain(query, duration):
+                stats.record_plan(query, duration, _explain_analyze(cursor, query, params))
+            return result
+
+@st.cache_data(ttl=CACHE_TTL)
+def _run_query_cached(query, params, table_versions, as_frame=False, name=None):
+    return _execute_query(query, params, as_frame, name)
+
+def _report_read_error(error):
+    if not isinstance(error, NoConnectionError):
+        st.error(f"❌ Ошибка выполнения запроса: {error}")
+
+def _cached_read(query, params=None, as_frame=False, name=None):
+    query_stats().record_call(query)
+    try:
+        return _run_query_cached(query, params, get_table_versions(_read_tables(query)), as_frame, name)
+    except psycopg2.Error as e:
+        _report_read_error(e)
+        return pd.DataFrame() if as_frame else []
+
+def run_query(query, params=None):
+    return _cached_read(query, params)
+
+def run_query_df(query, params=None):
+    return _cached_read(query, params, as_frame=True)
+
+def run_named(name, params=None):
+    return _cached_read(STATEMENTS[name], params, name=name)
+
+def run_named_df(name, params=None):
+    return _cached_read(STATEMENTS[name], params, as_frame=True, name=name)
+
+def fetch_named(name, params=None):
+    query_stats().record_call(STATEMENTS[name])
+    return _execute_query(STATEMENTS[name], params, name=name)
+
+class Snapshot:
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+
+class SnapshotStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshots = {}
+
+    def get(self, name):
+        version = get_table_versions(_read_tables(STATEMENTS[name]))
+        current = self.snapshots.get(name)
+        if current is not None and current.version == version:
+            return current
+
+        with self.lock:
+            current = self.snapshots.get(name)
+            if current is None or current.version != version:
+                current = self.snapshots[name] = Snapshot(version, fetch_named(name))
+        return current
+
+@st.cache_resource
+def snapshot_store():
+    return SnapshotStore()
+
+def snapshot(name):
+    try:
+        current = snapshot_store().get(name)
+    except psycopg2.Error as e:
+        _report_read_error(e)
         return []
+    return current.rows
+
+def run_query_arrow(query, params=None):
+    return pa.Table.from_pandas(run_query_df(query, params), preserve_index=False)
+
+def stream_query(query, params=None, itersize=STREAM_ITERSIZE, categories=CATEGORICAL_COLUMNS):
+    with connection() as conn:
+        if conn is None:
+            return
+
+        with conn.cursor(name=f"rac_stream_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = itersize
+            cursor.execute(query, params or ())
+            empty = True
+            while True:
+                rows = cursor.fetchmany(itersize)
+                if not rows:
+                    break
+                empty = False
+                yield cursor.description, _frame_from_columns(cursor.description, list(zip(*rows)), categories)
+            if empty:
+                yield cursor.description, _frame_from_columns(cursor.description, [[] for _ in cursor.description], categories)
+
+def export_csv(query, dest, params=None, itersize=STREAM_ITERSIZE):
+    total = 0
+    for _, chunk in stream_query(query, params, itersize, categories=()):
+        dest.write(chunk.to_csv(index=False, header=total == 0).encode("utf-8"))
+        total += len(chunk)
+    return total
+
+def export_parquet(query, dest, params=None, itersize=STREAM_ITERSIZE):
+    total = 0
+    writer = None
+    try:
+        for description, chunk in stream_query(query, params, itersize, categories=()):
+            if writer is None:
+                schema = pa.schema([(desc.name, _arrow_type(desc.type_code)) for desc in description])
+                writer = pq.ParquetWriter(dest, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False))
+            total += len(chunk)
     finally:
-        if 'cursor' in locals() and cursor is not None:
-            cursor.close()
-        if conn is not None:
-            conn.close()
+        if writer is not None:
+            writer.close()
+    return total
 
-def execute_non_query(query, params=None, fetch_id=False):
-    conn = init_connection()
-    if conn is None:
-        return None if fetch_id else False
+def export_dataset(name, export_format, dest):
+    query = EXPORTS[name][1]
+    try:
+        if export_format == "parquet":
+            return export_parquet(query, dest)
+        return export_csv(query, dest)
+    except Exception as e:
+        st.error(f"❌ Ошибка экспорта: {e}")
+        return None
 
-    cursor = conn.cursor()
+@st.cache_resource
+def _gather_executor():
+    return ThreadPoolExecutor(max_workers=POOL_MAX_CONN, thread_name_prefix="rac_gather")
+
+def _run_with_context(ctx, call):
+    thread = threading.current_thread()
+    previous = getattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, None)
+    add_script_run_ctx(thread, ctx)
     try:
-        cursor.execute(query, params or ())
+        return call()
+    finally:
+        setattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME, previous)
+
+def gather(*calls):
+    ctx = get_script_run_ctx()
+    executor = _gather_executor()
+    futures = [executor.submit(_run_with_context, ctx, call) for call in calls]
+    return [future.result() for future in futures]
+
+class Transaction:
+    def __init__(self, report_errors=True):
+        self.ok = False
+        self.error = None
+        self.report_errors = report_errors
+        self.tables = set()
+        self.conn = None
+        self.cursor = None
+        self.acquire_time = None
+        self._connection = None
+
+    def __enter__(self):
+        requested = time.perf_counter()
+        self._connection = connection()
+        self.conn = self._connection.__enter__()
+        self.acquire_time = time.perf_counter() - requested
+        if self.conn is not None:
+            self.cursor = self.conn.cursor()
+        return self
+
+    def _require_cursor(self):
+        if self.cursor is None:
+            raise NoConnectionError("нет соединения с базой данных")
+        return self.cursor
+
+    def _track_writes(self):
+        if self.cursor.query:
+            self.tables |= _written_tables(self.cursor.query.decode("utf-8", errors="replace"))
+
+    def _record(self, query, started, rows):
+        if isinstance(query, sql.Composable):
+            query = query.as_string(self.conn)
+        acquire, self.acquire_time = self.acquire_time, None
+        query_stats().record_execution(query, time.perf_counter() - started, rows, acquire=acquire)
+
+    def execute(self, query, params=None):
+        started = time.perf_counter()
+        self._require_cursor().execute(query, params or ())
+        self._record(query, started, self.cursor.rowcount)
+        self._track_writes()
+        return self.cursor
+
+    def execute_named(self, name, params=None):
+        started = time.perf_counter()
+        _execute_named(self.conn, self._require_cursor(), name, params)
+        self._record(STATEMENTS[name], started, self.cursor.rowcount)
+        self.tables |= _written_tables(STATEMENTS[name])
+        return self.cursor
+
+    def execute_values(self, query, rows, page_size=BULK_PAGE_SIZE, fetch=False):
+        started = time.perf_counter()
+        result = psycopg2.extras.execute_values(self._require_cursor(), query, rows, page_size=page_size, fetch=fetch)
+        self._record(query, started, len(rows))
+        self._track_writes()
+        return result
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.conn is not None:
+                if exc_type is None:
+                    self.conn.commit()
+                    self.ok = True
+                    invalidate_tables(self.tables)
+                else:
+                    self.conn.rollback()
+        except psycopg2.Error as e:
+            exc_type, exc = type(e), e
+        finally:
+            if self.cursor is not None:
+                self.cursor.close()
+            self._connection.__exit__(None, None, None)
+
+        if exc_type is None or not issubclass(exc_type, psycopg2.Error):
+            return False
+        self.error = exc
+        if self.conn is not None and self.report_errors:
+            st.error(f"❌ Ошибка транзакции: {exc}")
+        return True
+
+def transaction(report_errors=True):
+    return Transaction(report_errors)
+
+def execute_non_query(query, params=None, fetch_id=False):
+    result = None
+    with transaction() as tx:
+        cursor = tx.execute(query, params)
         if fetch_id:
             result = cursor.fetchone()
-            conn.commit()
-            return result[0] if result else None
+
+    if fetch_id:
+        return result[0] if tx.ok and result else None
+    return tx.ok
+
+def bulk_insert(table, columns, rows, returning=None, tx=None, page_size=BULK_PAGE_SIZE):
+    if tx is None:
+        with transaction() as tx:
+            result = bulk_insert(table, columns, rows, returning, tx, page_size)
+        if not tx.ok:
+            return None if returning else False
+        return result
+
+    rows = [tuple(row) for row in rows]
+    if not rows:
+        return [] if returning else 0
+
+    query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+    if returning:
+        query += sql.SQL(" RETURNING {}").format(sql.Identifier(returning))
+
+    result = tx.execute_values(query, rows, page_size=page_size, fetch=bool(returning))
+    return [row[0] for row in result] if returning else len(rows)
+
+def insert_returning(table, values, tx=None):
+    if tx is None:
+        with transaction() as tx:
+            row = insert_returning(table, values, tx)
+        return row if tx.ok else None
+
+    columns = list(values)
+    query = sql.SQL("INSERT INTO {} ({}) VALUES ({}) RETURNING *").format(
+        sql.Identifier(table),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        sql.SQL(", ").join(sql.Placeholder() * len(columns))
+    )
+    cursor = tx.execute(query, [values[c] for c in columns])
+    column_names = [desc[0] for desc in cursor.description]
+    return dict(zip(column_names, cursor.fetchone()))
+
+def delete_many(table, ids, tx=None):
+    if tx is None:
+        with transaction() as tx:
+            deleted = delete_many(table, ids, tx)
+        return deleted if tx.ok else None
+
+    ids = list(ids)
+    if not ids:
+        return 0
+
+    query = sql.SQL("DELETE FROM {} WHERE {} = ANY(%s)").format(
+        sql.Identifier(table),
+        sql.Identifier(PRIMARY_KEYS[table])
+    )
+    deleted = tx.execute(query, (ids,)).rowcount
+    tx.tables.update(CASCADE_TABLES.get(table, ()))
+    return deleted
+
+def _code_lookup(mapping):
+    lookup = {label.lower(): code for label, code in mapping.items()}
+    lookup.update({code: code for code in mapping.values()})
+    return lookup
+
+def _import_text(chunk, column):
+    if column not in chunk:
+        return pd.Series("", index=chunk.index, dtype=object)
+    return chunk[column].astype(str).str.strip()
+
+def _import_date(text):
+    parsed = pd.to_datetime(text, format="%d.%m.%Y", errors="coerce")
+    return parsed.fillna(pd.to_datetime(text, format="%Y-%m-%d", errors="coerce"))
+
+def _import_checks(chunk, checks, errors):
+    bad = pd.Series(False, index=chunk.index)
+    for mask, column, message in checks:
+        mask = mask.fillna(True)
+        if mask.any():
+            errors.append(pd.DataFrame({"row": chunk.index[mask.to_numpy()] + 2, "column": column, "message": message}))
+        bad |= mask
+    return bad
+
+def _import_duplicates(keys, bad, seen):
+    return ~bad & (keys.where(~bad).duplicated() | keys.isin(seen))
+
+def _validate_musicians(chunk, seen, errors):
+    rows = pd.DataFrame({
+        "row_number": chunk.index + 2,
+        "first_name": _import_text(chunk, "first_name"),
+        "last_name": _import_text(chunk, "last_name"),
+        "phone": _import_text(chunk, "phone"),
+        "telegram": _import_text(chunk, "telegram"),
+        "instrument": _import_text(chunk, "instrument").str.lower().map(_code_lookup(INSTRUMENTS))
+    })
+    bad = _import_checks(chunk, [
+        (rows["last_name"] == "", "last_name", "Фамилия обязательна"),
+        (rows["last_name"].str.len() > 50, "last_name", "Фамилия длиннее 50 символов"),
+        (rows["first_name"].str.len() > 50, "first_name", "Имя длиннее 50 символов"),
+        (~rows["phone"].str.match(PHONE_PATTERN), "phone", "Телефон не в формате +375XXXXXXXXX"),
+        ((rows["telegram"] != "") & ~rows["telegram"].str.startswith("@"), "telegram", "Telegram должен начинаться с @"),
+        (rows["telegram"].str.len() > 100, "telegram", "Telegram длиннее 100 символов"),
+        (rows["instrument"].isna(), "instrument", "Неизвестный инструмент")
+    ], errors)
+    bad |= _import_checks(chunk, [
+        (_import_duplicates(rows["phone"], bad, seen), "phone", "Телефон повторяется в файле")
+    ], errors)
+    seen.update(rows.loc[~bad, "phone"])
+    rows["telegram"] = rows["telegram"].mask(rows["telegram"] == "")
+    return rows[~bad]
+
+def _validate_bands(chunk, seen, errors):
+    genre = _import_text(chunk, "genre")
+    founded = _import_text(chunk, "founded_date")
+    rows = pd.DataFrame({
+        "row_number": chunk.index + 2,
+        "band_name": _import_text(chunk, "band_name"),
+        "genre": genre.str.lower().map(_code_lookup(GENRES)),
+        "founded_date": _import_date(founded).mask(founded == "", pd.Timestamp.today().normalize())
+    })
+    bad = _import_checks(chunk, [
+        (rows["band_name"] == "", "band_name", "Название обязательно"),
+        (rows["band_name"].str.len() > 100, "band_name", "Название длиннее 100 символов"),
+        ((genre != "") & rows["genre"].isna(), "genre", "Неизвестный жанр"),
+        (rows["founded_date"].isna(), "founded_date", "Некорректная дата основания"),
+        (rows["founded_date"] > pd.Timestamp.today(), "founded_date", "Дата основания в будущем")
+    ], errors)
+    bad |= _import_checks(chunk, [
+        (_import_duplicates(rows["band_name"], bad, seen), "band_name", "Коллектив повторяется в файле")
+    ], errors)
+    seen.update(rows.loc[~bad, "band_name"])
+    rows["founded_date"] = rows["founded_date"].dt.date
+    return rows[~bad]
+
+def _validate_memberships(chunk, seen, errors):
+    joined = _import_text(chunk, "join_date")
+    rows = pd.DataFrame({
+        "row_number": chunk.index + 2,
+        "phone": _import_text(chunk, "phone"),
+        "band_name": _import_text(chunk, "band_name"),
+        "join_date": _import_date(joined).mask(joined == "", pd.Timestamp.today().normalize())
+    })
+    pairs = rows["phone"] + "\t" + rows["band_name"]
+    bad = _import_checks(chunk, [
+        (~rows["phone"].str.match(PHONE_PATTERN), "phone", "Телефон не в формате +375XXXXXXXXX"),
+        (rows["band_name"] == "", "band_name", "Название коллектива обязательно"),
+        (rows["join_date"].isna(), "join_date", "Некорректная дата вступления"),
+        (rows["join_date"] > pd.Timestamp.today(), "join_date", "Дата вступления в будущем")
+    ], errors)
+    bad |= _import_checks(chunk, [
+        (_import_duplicates(pairs, bad, seen), "band_name", "Участие повторяется в файле")
+    ], errors)
+    seen.update(pairs[~bad])
+    rows["join_date"] = rows["join_date"].dt.date
+    return rows[~bad]
+
+def _stage_import(tx, definition, rows):
+    tx.execute(f"CREATE TEMP TABLE import_staging (row_number integer, {definition}) ON COMMIT DROP")
+    buffer = io.StringIO()
+    rows.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    statement = sql.SQL("COPY import_staging ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.SQL(", ").join(map(sql.Identifier, rows.columns))
+    )
+    tx.cursor.copy_expert(statement.as_string(tx.conn), buffer)
+
+def _upsert_counts(cursor):
+    flags = [row[0] for row in cursor.fetchall()]
+    return sum(flags), len(flags) - sum(flags)
+
+def _upsert_musicians(tx, rows):
+    _stage_import(tx, "first_name text, last_name text, phone text, telegram text, instrument text", rows)
+    inserted, updated = _upsert_counts(tx.execute("""
+        INSERT INTO musicians (first_name, last_name, phone, telegram, instrument)
+        SELECT COALESCE(first_name, ''), last_name, phone, telegram, instrument FROM import_staging
+        ON CONFLICT (phone) DO UPDATE
+        SET first_name = COALESCE(NULLIF(EXCLUDED.first_name, ''), musicians.first_name),
+            last_name = EXCLUDED.last_name,
+            telegram = COALESCE(EXCLUDED.telegram, musicians.telegram),
+            instrument = EXCLUDED.instrument
+        RETURNING (xmax = 0)
+    """))
+    return inserted, updated, None
+
+def _upsert_bands(tx, rows):
+    _stage_import(tx, "band_name text, genre text, founded_date date", rows)
+    updated = tx.execute("""
+        UPDATE bands b SET genre = s.genre, founded_date = s.founded_date
+        FROM import_staging s
+        WHERE b.band_name = s.band_name
+    """).rowcount
+    inserted = tx.execute("""
+        INSERT INTO bands (band_name, genre, founded_date)
+        SELECT s.band_name, s.genre, s.founded_date FROM import_staging s
+        WHERE NOT EXISTS (SELECT 1 FROM bands b WHERE b.band_name = s.band_name)
+    """).rowcount
+    return inserted, updated, None
+
+def _upsert_memberships(tx, rows):
+    _stage_import(tx, "phone text, band_name text, join_date date", rows)
+    tx.execute("""
+        CREATE TEMP TABLE import_resolved ON COMMIT DROP AS
+        SELECT s.row_number, m.musician_id, b.band_id, s.join_date
+        FROM import_staging s
+        LEFT JOIN musicians m ON m.phone = s.phone
+        LEFT JOIN LATERAL (
+            SELECT band_id FROM bands WHERE band_name = s.band_name ORDER BY band_id LIMIT 1
+        ) b ON true
+    """)
+    unresolved = pd.DataFrame(_fetch_dicts(tx.execute("""
+        SELECT row_number AS row,
+               CASE WHEN musician_id IS NULL THEN 'phone' ELSE 'band_name' END AS column,
+               CASE WHEN musician_id IS NULL THEN 'Музыкант с таким телефоном не найден'
+                    ELSE 'Коллектив не найден' END AS message
+        FROM import_resolved
+        WHERE musician_id IS NULL OR band_id IS NULL
+    """)))
+    inserted, updated = _upsert_counts(tx.execute("""
+        INSERT INTO band_membership (band_id, musician_id, join_date)
+        SELECT band_id, musician_id, join_date FROM import_resolved
+        WHERE musician_id IS NOT NULL AND band_id IS NOT NULL
+        ON CONFLICT (band_id, musician_id) DO UPDATE SET join_date = EXCLUDED.join_date
+        RETURNING (xmax = 0)
+    """))
+    return inserted, updated, unresolved
+
+IMPORTS = {
+    "musicians": ("Музыканты", ["last_name", "first_name", "instrument", "phone", "telegram"],
+                  ["last_name", "instrument", "phone"], _validate_musicians, _upsert_musicians),
+    "bands": ("Коллективы", ["band_name", "genre", "founded_date"],
+              ["band_name"], _validate_bands, _upsert_bands),
+    "memberships": ("Составы коллективов", ["phone", "band_name", "join_date"],
+                    ["phone", "band_name"], _validate_memberships, _upsert_memberships)
+}
+
+def read_import_chunks(file, file_name, chunksize=IMPORT_CHUNK):
+    if file_name.lower().endswith(".xlsx"):
+        frame = pd.read_excel(file, dtype=str, keep_default_na=False)
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start:start + chunksize]
+    else:
+        yield from pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunksize,
+                               sep=None, engine="python", encoding="utf-8-sig")
+
+def import_file(name, file, file_name, chunksize=IMPORT_CHUNK):
+    _, _, required, validate, upsert = IMPORTS[name]
+    summary = {"rows": 0, "inserted": 0, "updated": 0}
+    errors = []
+    seen = set()
+
+    try:
+        for chunk in read_import_chunks(file, file_name, chunksize):
+            chunk.columns = chunk.columns.str.strip().str.lower()
+            missing = [column for column in required if column not in chunk.columns]
+            if missing:
+                errors.append(pd.DataFrame({"row": [1], "column": [", ".join(missing)], "message": ["Нет обязательной колонки"]}))
+                break
+
+            summary["rows"] += len(chunk)
+            rows = validate(chunk, seen, errors)
+            if rows.empty:
+                continue
+
+            with transaction(report_errors=False) as tx:
+                inserted, updated, rejected = upsert(tx, rows)
+            if tx.ok:
+                summary["inserted"] += inserted
+                summary["updated"] += updated
+                if rejected is not None and not rejected.empty:
+                    errors.append(rejected)
+            else:
+                errors.append(pd.DataFrame({"row": rows["row_number"], "column": "", "message": f"Ошибка загрузки: {tx.error}"}))
+    except (ImportError, ValueError, UnicodeDecodeError) as e:
+        st.error(f"❌ Не удалось прочитать файл: {e}")
+        return None
+
+    if errors:
+        summary["errors"] = pd.concat(errors, ignore_index=True).sort_values("row", kind="stable")
+    else:
+        summary["errors"] = pd.DataFrame(columns=["row", "column", "message"])
+    return summary
+
+def find_rehearsal_conflicts(location, start_dt, end_dt, exclude_id=None):
+    with transaction() as tx:
+        conflicts = _fetch_dicts(tx.execute_named("rehearsal_conflicts", (location, start_dt, end_dt, exclude_id)))
+    return conflicts if tx.ok else []
+
+def book_rehearsal(band_id, start_dt, duration_minutes, location, rehearsal_id=None):
+    values = {
+        "band_id": band_id,
+        "rehearsal_date": start_dt,
+        "duration_minutes": duration_minutes,
+        "location": location
+    }
+
+    rehearsal = None
+    with transaction(report_errors=False) as tx:
+        if rehearsal_id is None:
+            rehearsal = insert_returning("rehearsals", values, tx=tx)
         else:
-            conn.commit()
-            return True
-    except Exception as e:
-        conn.rollback()
-        st.error(f"❌ Ошибка транзакции: {e}")
-        return None if fetch_id else False
-    finally:
-        if 'cursor' in locals() and cursor is not None:
-            cursor.close()
-        if conn is not None:
-            conn.close()
+            query = """
+                UPDATE rehearsals
+                SET band_id=%s, rehearsal_date=%s, duration_minutes=%s, location=%s
+                WHERE rehearsal_id=%s
+                RETURNING *
+            """
+            rows = _fetch_dicts(tx.execute(query, (band_id, start_dt, duration_minutes, location, rehearsal_id)))
+            rehearsal = rows[0] if rows else None
+
+    if tx.ok and rehearsal is not None:
+        return {"ok": True, "rehearsal": rehearsal, "conflicts": []}
+    if tx.ok:
+        return {"ok": False, "rehearsal": None, "conflicts": []}
+
+    if isinstance(tx.error, psycopg2.errors.ExclusionViolation):
+        end_dt = start_dt + timedelta(minutes=duration_minutes)
+        return {"ok": False, "rehearsal": None, "conflicts": find_rehearsal_conflicts(location, start_dt, end_dt, rehearsal_id)}
+
+    if tx.conn is not None:
+        st.error(f"❌ Ошибка транзакции: {tx.error}")
+    return {"ok": False, "rehearsal": None, "conflicts": []}
+
+def series_dates(start_dt, interval_weeks=1, until=None, count=None):
+    limit = min(count or MAX_SERIES_OCCURRENCES, MAX_SERIES_OCCURRENCES)
+    dates = []
+    current = start_dt
+    while len(dates) < limit and (until is None or current.date() <= until):
+        dates.append(current)
+        current += timedelta(weeks=interval_weeks)
+    truncated = (len(dates) == MAX_SERIES_OCCURRENCES and (count is None or count > MAX_SERIES_OCCURRENCES)
+                 and (until is None or current.date() <= until))
+    return dates, truncated
+
+def book_rehearsal_series(band_id, start_dt, duration_minutes, location, interval_weeks=1, until=None, count=None):
+    starts, truncated = series_dates(start_dt, interval_weeks, until, count)
+    params = {
+        "starts": starts,
+        "duration": duration_minutes,
+        "location": location,
+        "band_id": band_id
+    }
+
+    for _ in range(SERIES_RETRIES):
+        with transaction(report_errors=False) as tx:
+            rows = _fetch_dicts(tx.execute_named("book_series", params))
+        if tx.ok:
+            return {
+                "ok": True,
+                "booked": [r for r in rows if r['status'] == 'booked'],
+                "conflicts": [r for r in rows if r['status'] == 'conflict'],
+                "truncated": truncated
+            }
+        if not isinstance(tx.error, psycopg2.errors.ExclusionViolation):
+            break
 
-def delete_record(table, id_column, record_id):
+    if tx.conn is not None:
+        st.error(f"❌ Ошибка транзакции: {tx.error}")
+    return {"ok": False, "booked": [], "conflicts": [], "truncated": False}
+
+class RoomCalendar:
+    def __init__(self, window_start, window_end, rehearsals):
+        self.window_start = window_start
+        self.window_end = window_end
+        self.rooms = {}
+        for r in sorted(rehearsals, key=lambda r: r['rehearsal_date']):
+            starts, ends, entries = self.rooms.setdefault(r['location'], ([], [], []))
+            starts.append(r['rehearsal_date'])
+            ends.append(r['rehearsal_date'] + timedelta(minutes=r['duration_minutes']))
+            entries.append(r)
+
+    def _spans(self, location, start, end, exclude_id=None):
+        starts, ends, entries = self.rooms.get(location, ([], [], []))
+        for i in range(bisect.bisect_right(ends, start), bisect.bisect_left(starts, end)):
+            if entries[i]['rehearsal_id'] != exclude_id:
+                yield starts[i], ends[i], entries[i]
+
+    def overlaps(self, location, start, end, exclude_id=None):
+        return [r for _, _, r in self._spans(location, start, end, exclude_id)]
+
+    def is_free(self, location, start, end, exclude_id=None):
+        return next(self._spans(location, start, end, exclude_id), None) is None
+
+    def rehearsals(self, start, end, locations=None):
+        rows = [r for location in locations or LOCATIONS for r in self.overlaps(location, start, end)]
+        return sorted(rows, key=lambda r: r['rehearsal_date'])
+
+    def free_gaps(self, location, start, end, min_minutes=0, exclude_id=None):
+        gaps = []
+        cursor = start
+        for busy_start, busy_end, _ in self._spans(location, start, end, exclude_id):
+            if busy_start > cursor:
+                gaps.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return [(a, b) for a, b in gaps if b - a >= timedelta(minutes=min_minutes)]
+
+    def occupancy(self, location, start, end):
+        busy = sum((min(e, end) - max(s, start) for s, e, _ in self._spans(location, start, end)), timedelta())
+        return busy / (end - start)
+
+    def free_slots(self, start_date, end_date, duration_minutes, start_times, locations=None, not_before=None, exclude_id=None):
+        offsets = pd.to_timedelta([timedelta(hours=t.hour, minutes=t.minute) for t in start_times])
+        grid = pd.MultiIndex.from_product([pd.date_range(start_date, end_date), offsets])
+        slot_starts = grid.get_level_values(0) + grid.get_level_values(1)
+        if not_before is not None:
+            slot_starts = slot_starts[slot_starts >= not_before]
+        slot_ends = slot_starts + timedelta(minutes=duration_minutes)
+
+        slots = []
+        for location in locations or LOCATIONS:
+            starts, ends, entries = self.rooms.get(location, ([], [], []))
+            keep = [i for i, r in enumerate(entries) if r['rehearsal_id'] != exclude_id]
+            busy_starts = pd.DatetimeIndex([starts[i] for i in keep])
+            busy_ends = pd.DatetimeIndex([ends[i] for i in keep])
+            free = busy_ends.searchsorted(slot_starts, side="right") >= busy_starts.searchsorted(slot_ends, side="left")
+            slots += [{"location": location, "slot_start": slot} for slot in slot_starts[free].to_pydatetime()]
+        return sorted(slots, key=lambda slot: slot['slot_start'])
+
+@st.cache_resource(ttl=CACHE_TTL, max_entries=CALENDAR_CACHE_ENTRIES)
+def _load_room_calendar(window_start, window_end, table_versions):
+    rows = fetch_named("rehearsals_in_range", (window_start - CALENDAR_MARGIN, window_end + CALENDAR_MARGIN))
+    return RoomCalendar(window_start, window_end, rows)
+
+def room_calendar(start_date, end_date=None):
+    first = start_date.toordinal() // CALENDAR_DAYS
+    last = (end_date or start_date).toordinal() // CALENDAR_DAYS
+    window_start = datetime.fromordinal(first * CALENDAR_DAYS)
+    window_end = window_start + timedelta(days=(last - first + 1) * CALENDAR_DAYS)
+    versions = get_table_versions(_read_tables(STATEMENTS["rehearsals_in_range"]))
     try:
-        sql = f"DELETE FROM {table} WHERE {id_column} = %s"
-        return execute_non_query(sql, (record_id,))
-    except Exception as e:
-        st.error(f"Ошибка удаления: {e}")
-        return False
+        return _load_room_calendar(window_start, window_end, versions)
+    except psycopg2.Error as e:
+        _report_read_error(e)
+        return RoomCalendar(window_start, window_end, [])
+
+def dashboard_stats(estimate_above=None):
+    res = run_named("dashboard_stats", {"estimate_above": estimate_above})
+    if not res:
+        return {"musicians": 0, "bands": 0, "concerts": 0, "rehearsals": 0}
+    return res[0]
+
+def like_pattern(text):
+    return '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def search_musicians(text, limit=SEARCH_LIMIT):
+    instrument_codes = [code for name, code in INSTRUMENTS.items() if text.lower() in name.lower()]
+    params = {"q": text, "pattern": like_pattern(text), "instruments": instrument_codes, "limit": limit}
+    return run_named("search_musicians", params)
+
+def search_concerts(text, limit=SEARCH_LIMIT):
+    params = {"q": text, "pattern": like_pattern(text), "limit": limit}
+    return run_named("search_concerts", params)
+
+def page_sql(query, sort_keys, params=(), after=None, limit=PAGE_SIZE, descending=False):
+    direction = "DESC" if descending else "ASC"
+    page_params = list(params)
+    where = ""
+    if after is not None:
+        placeholders = ", ".join(["%s"] * len(sort_keys))
+        where = f"WHERE ({', '.join(sort_keys)}) {'<' if descending else '>'} ({placeholders})"
+        page_params += list(after)
+
+    order_by = ", ".join(f"{key} {direction}" for key in sort_keys)
+    page_query = f"SELECT * FROM ({query}) AS page_source {where} ORDER BY {order_by} LIMIT %s"
+    return page_query, page_params + [limit]
+
+def paginate(query, sort_keys, params=(), after=None, limit=PAGE_SIZE, descending=False):
+    return run_query(*page_sql(query, sort_keys, params, after, limit, descending))
+
+def count_sql(query):
+    return f"SELECT COUNT(*) AS count FROM ({query}) AS count_source"
+
+def count_rows(query, params=()):
+    res = run_query(count_sql(query), list(params))
+    return res[0]['count'] if res else 0
+
+def keyset_page(key, query, sort_keys, params=(), limit=PAGE_SIZE, descending=False):
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    rows = paginate(query, sort_keys, params, cursors[-1], limit + 1, descending)
+    return rows[:limit], len(rows) > limit
+
+def page_controls(key, rows, sort_keys, has_next, total=None, limit=PAGE_SIZE):
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    col1, col2, col3 = st.columns([1, 3, 1])
+
+    if col1.button("← Назад", key=f"{key}_prev", disabled=len(cursors) == 1, use_container_width=True):
+        cursors.pop()
+        st.rerun()
+
+    caption = f"Страница {len(cursors)}"
+    if total is not None:
+        caption += f" из {max(1, -(-total // limit))} · всего записей: {total}"
+    col2.caption(caption)
+
+    if col3.button("Вперёд →", key=f"{key}_next", disabled=not has_next or not rows, use_container_width=True):
+        cursors.append(tuple(rows[-1][k] for k in sort_keys))
+        st.rerun()
 
 def sidebar_pg():
     with st.sidebar:
@@ -107,7 +1492,9 @@ def sidebar_pg():
             "pages/bands.py": "🎸 Коллективы",
             "pages/concerts.py": "🎭 Концерты",
             "pages/rehearsals.py": "🎻 Репетиции",
-            "pages/reports.py": "📊 Отчеты"
+            "pages/reports.py": "📊 Отчеты",
+            "pages/data_import.py": "📥 Импорт",
+            "pages/performance.py": "⏱️ Производительность"
         }
         
         for page_path, icon_label in pages.items():